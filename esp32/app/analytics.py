@@ -0,0 +1,194 @@
+"""
+Vector maths on price series, with ulab when the firmware has it.
+
+This module includes functions to:
+- Get the extremes and the sum of a series
+- Sort a series, for percentiles
+- Sum every window of k consecutive slots
+- Scale a series and add an offset per slot, for the tariff transform
+- Reduce groups of slots to their mean, min and max, for resampling
+
+Each function has a ulab backend and a pure-Python fallback that give the
+same integers. ulab computes in floating point, which is exact for the
+integers used here as long as they stay below 2**24: prices are at most
+32767 öre and at most 200 slots are summed, and the tariff transform is
+arranged so that no intermediate value exceeds that bound either.
+"""
+
+from array import array
+
+try:
+    from ulab import numpy as np
+except ImportError:  # Firmware built without ulab
+    np = None
+
+_np = np  # Backend in use, None for pure Python
+backend = "python" if np is None else "ulab"
+
+
+def use(name):
+    # type: (str) -> None
+    """
+    Select the backend, to compare them.
+
+    Args:
+        name (str): "ulab" or "python".
+
+    Raises:
+        ValueError: If ulab is asked for but not available.
+    """
+    global _np, backend
+    if name == "ulab" and np is None:
+        raise ValueError("ulab is not available")
+    _np = np if name == "ulab" else None
+    backend = name
+
+
+def extremes(values):
+    # type: (array) -> tuple
+    """
+    Get the extremes and the sum of a series in one pass.
+
+    Args:
+        values (array): Prices in öre, at least one.
+
+    Returns:
+        tuple: (min, slot of the first min, max, slot of the first max, sum)
+    """
+    if _np is not None:
+        a = _np.array(values, dtype=_np.float)
+        return (
+            int(_np.min(a)),
+            int(_np.argmin(a)),
+            int(_np.max(a)),
+            int(_np.argmax(a)),
+            int(_np.sum(a)),
+        )
+
+    low = high = total = values[0]
+    argmin = argmax = 0
+    for i in range(1, len(values)):
+        v = values[i]
+        total += v
+        if v < low:
+            low = v
+            argmin = i
+        elif v > high:
+            high = v
+            argmax = i
+
+    return low, argmin, high, argmax, total
+
+
+def sort(values):
+    # type: (array) -> list
+    """
+    Get the values of a series in ascending order.
+    """
+    if _np is not None:
+        return [int(v) for v in _np.sort(_np.array(values, dtype=_np.float))]
+
+    return sorted(values)
+
+
+def window_sums(values, k):
+    # type: (array, int) -> array
+    """
+    Sum every window of k consecutive slots.
+
+    Args:
+        values (array): Prices in öre.
+        k (int): Window length in slots.
+
+    Returns:
+        array: Sum of the window starting at each slot, empty if k is longer
+            than values.
+    """
+    n = len(values)
+    if k < 1 or k > n:
+        return array("i")
+    if _np is not None:
+        sums = _np.convolve(_np.array(values, dtype=_np.float), _np.ones(k))
+        return array("i", [int(v) for v in sums[k - 1 : n]])
+
+    # Add the slot that enters the window and subtract the one that leaves
+    total = 0
+    for i in range(k):
+        total += values[i]
+    sums = array("i", bytes(4 * (n - k + 1)))
+    sums[0] = total
+    for i in range(k, n):
+        total += values[i] - values[i - k]
+        sums[i - k + 1] = total
+
+    return sums
+
+
+def scale_offset(values, scale, offsets):
+    # type: (array, int, array) -> array
+    """
+    Get floor((values[i] * scale + offsets[i]) / 100) for every slot.
+
+    Args:
+        values (array): Prices in öre.
+        scale (int): Factor, at most 256 to keep the products exact.
+        offsets (array): Offset per slot, below 2**23 in magnitude.
+
+    Returns:
+        array: The results, typecode "h".
+    """
+    n = len(values)
+    if _np is not None:
+        a = _np.array(values, dtype=_np.float) * scale
+        a = _np.floor((a + _np.array(offsets, dtype=_np.float)) / 100)
+        return array("h", [int(v) for v in a])
+
+    out = array("h", bytes(2 * n))
+    for i in range(n):
+        out[i] = (values[i] * scale + offsets[i]) // 100
+
+    return out
+
+
+def groups(values, size):
+    # type: (array, int) -> tuple
+    """
+    Reduce each group of size consecutive slots to its mean, min and max.
+    A last group with fewer slots is left out.
+
+    Args:
+        values (array): Prices in öre.
+        size (int): Slots per group.
+
+    Returns:
+        tuple: (means, mins, maxs) as arrays of typecode "h", the means
+            rounded half up.
+    """
+    n = len(values) // size
+    means = array("h", bytes(2 * n))
+    if _np is not None:
+        a = _np.array(values[: n * size], dtype=_np.float).reshape((n, size))
+        sums = _np.sum(a, axis=1)
+        mins = array("h", [int(v) for v in _np.min(a, axis=1)])
+        maxs = array("h", [int(v) for v in _np.max(a, axis=1)])
+        for g in range(n):
+            means[g] = (2 * int(sums[g]) + size) // (2 * size)
+        return means, mins, maxs
+
+    mins = array("h", bytes(2 * n))
+    maxs = array("h", bytes(2 * n))
+    for g in range(n):
+        start = g * size
+        low = high = total = values[start]
+        for i in range(start + 1, start + size):
+            v = values[i]
+            total += v
+            if v < low:
+                low = v
+            elif v > high:
+                high = v
+        means[g] = (2 * total + size) // (2 * size)
+        mins[g] = low
+        maxs[g] = high
+
+    return means, mins, maxs
@@ -0,0 +1,154 @@
+"""
+A persistent price cache on flash.
+
+This module includes a class to:
+- Store price series in a single struct-packed file indexed by zone and date
+- Verify each series with a CRC32 checksum when it is loaded
+- Replace the file atomically so a power cut never leaves it half written
+"""
+
+import os
+import struct
+from array import array
+from binascii import crc32
+from app.series import PriceSeries
+
+_MAGIC = b"KWHP"
+_VERSION = 1
+_HEADER = ">4sBB"  # magic, version, number of entries
+_ENTRY = ">4sHBBBxHI"  # zone, year, month, day, slot minutes, count, crc32
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_ENTRY_SIZE = struct.calcsize(_ENTRY)
+
+
+class PriceCache:
+    """
+    Binary cache of price series keyed by (zone, date).
+
+    File layout: a header, an index with one fixed-size entry per series,
+    then the raw array('h') data of each series in index order.
+    """
+
+    def __init__(self, path="prices.bin", keep=8):
+        # type: (str, int) -> None
+        """
+        Initialize the cache.
+
+        Args:
+            path (str): Cache file on the filesystem.
+            keep (int): Maximum number of series kept in the file.
+        """
+        self.path = path
+        self.keep = keep
+
+    def _index(self, f):
+        # type: (file) -> list
+        """
+        Read the index of an open cache file.
+
+        Returns:
+            list: (zone, date, slot, count, crc, offset) per entry, empty if
+                the file is not a valid cache.
+        """
+        header = f.read(_HEADER_SIZE)
+        if len(header) < _HEADER_SIZE:
+            return []
+        magic, version, n = struct.unpack(_HEADER, header)
+        if magic != _MAGIC or version != _VERSION:
+            return []
+        index = []
+        offset = _HEADER_SIZE + n * _ENTRY_SIZE
+        for _ in range(n):
+            zone, year, month, day, slot, count, crc = struct.unpack(
+                _ENTRY, f.read(_ENTRY_SIZE)
+            )
+            zone = zone.rstrip(b"\0").decode()
+            index.append((zone, (year, month, day), slot, count, crc, offset))
+            offset += 2 * count
+
+        return index
+
+    def _read(self, f, entry):
+        # type: (file, tuple) -> PriceSeries
+        """
+        Read and verify the series of one index entry.
+
+        Returns:
+            PriceSeries: The series, or None if the checksum does not match.
+        """
+        zone, date, slot, count, crc, offset = entry
+        f.seek(offset)
+        values = array("h", bytes(2 * count))
+        if f.readinto(values) != 2 * count or crc32(values) != crc:
+            return None
+
+        return PriceSeries(date, zone, values, slot)
+
+    def load(self, zone, date):
+        # type: (str, tuple) -> PriceSeries
+        """
+        Load a cached series.
+
+        Args:
+            zone (str): Bidding zone.
+            date (tuple): (year, month, day)
+
+        Returns:
+            PriceSeries: The cached series, or None if missing or corrupt.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                for entry in self._index(f):
+                    if entry[0] == zone and entry[1] == date:
+                        return self._read(f, entry)
+        except OSError:
+            pass  # No cache file yet
+        except ValueError as e:
+            print(f"Could not read price cache: {e}")
+
+        return None
+
+    def store(self, series, oldest=None):
+        # type: (PriceSeries, tuple) -> None
+        """
+        Add or replace a series and rewrite the cache file atomically.
+
+        Args:
+            series (PriceSeries): Series to store.
+            oldest (tuple): Entries dated before this (year, month, day) are
+                dropped.
+        """
+        kept = [series]
+        try:
+            with open(self.path, "rb") as f:
+                for entry in self._index(f):
+                    if (entry[0], entry[1]) == (series.zone, series.date):
+                        continue
+                    if oldest is not None and entry[1] < oldest:
+                        continue
+                    cached = self._read(f, entry)
+                    if cached is not None:
+                        kept.append(cached)
+        except (OSError, ValueError):
+            pass  # No usable cache yet
+        kept = kept[: self.keep]
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(struct.pack(_HEADER, _MAGIC, _VERSION, len(kept)))
+            for s in kept:
+                f.write(
+                    struct.pack(
+                        _ENTRY,
+                        s.zone.encode(),
+                        s.date[0],
+                        s.date[1],
+                        s.date[2],
+                        s.slot,
+                        len(s),
+                        crc32(s.values),
+                    )
+                )
+            for s in kept:
+                f.write(s.values)
+        os.rename(tmp, self.path)
@@ -0,0 +1,71 @@
+"""
+A module providing one local time snapshot per tick.
+
+This module includes a class to:
+- Read the RTC once per tick and split it into local date and time fields
+- Share the snapshot with the dial, the date label and the price slot logic
+- Count price slots from the UTC epoch of local midnight, so the slot is
+  right on the 23- and 25-hour days of the DST transitions
+"""
+
+import time
+from app.swe_time import dst_offset, midnight
+
+
+class Clock:
+    """
+    Local time snapshot derived from the integer epoch returned by time.time().
+    """
+
+    def __init__(self):
+        # type: () -> None
+        """
+        Initialize the clock and take a first snapshot.
+        """
+        self.midnight = None  # UTC epoch of local midnight today
+        self._today = None  # Local date midnight was computed for
+        self.tick()
+
+    def tick(self):
+        # type: () -> Clock
+        """
+        Take a new snapshot. All fields come from a single RTC read, so they
+        agree with each other even across a minute or day boundary.
+
+        Returns:
+            Clock: The updated clock instance.
+        """
+        self.epoch = time.time()
+        self.dst_offset = dst_offset(self.epoch)
+        local = time.gmtime(self.epoch + self.dst_offset * 3600)
+        self.year = local[0]
+        self.month = local[1]
+        self.day = local[2]
+        self.hour = local[3]
+        self.minute = local[4]
+        self.second = local[5]
+        self.weekday = local[6]  # Monday is 0
+        if self._today != (self.year, self.month, self.day):
+            self._today = (self.year, self.month, self.day)
+            self.midnight = midnight(self._today)
+        # 15-minute interval since midnight, 0-91 or 0-99 on DST transition days
+        self.slot = (self.epoch - self.midnight) // 900
+
+        return self
+
+    def date(self, days=0):
+        # type: (int) -> tuple
+        """
+        Get the local date, optionally shifted by whole days.
+
+        Args:
+            days (int): Days to add to the current date.
+
+        Returns:
+            tuple: (year, month, day)
+        """
+        if not days:
+            return self.year, self.month, self.day
+        local = time.gmtime(self.epoch + self.dst_offset * 3600 + days * 86400)
+
+        return local[0], local[1], local[2]
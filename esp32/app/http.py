@@ -0,0 +1,471 @@
+"""
+A small bounded-memory HTTP/1.1 client.
+
+This module includes classes to:
+- Decode a response incrementally from fixed-size chunks, including chunked
+  transfer encoding, and stream the body to a callback
+- Send GET and HEAD requests over one persistent keep-alive connection
+- Do the same from an asyncio task, yielding while the network is slow
+- Enforce connect and read timeouts and a cap on the body size
+- Count connections opened, to show how many handshakes were saved
+"""
+
+import asyncio
+import errno
+import socket
+
+try:
+    import tls
+except ImportError:  # Firmware before tls replaced ssl
+    tls = None
+    import ssl
+
+# Decoder states
+_STATUS = 0  # Status line
+_HEADER = 1  # Header lines
+_BODY = 2  # Body of known length, or until the connection closes
+_CHUNK_SIZE = 3  # Chunk size line
+_CHUNK_DATA = 4  # Chunk data
+_CHUNK_END = 5  # CRLF after chunk data
+_TRAILER = 6  # Trailer lines after the last chunk
+_DONE = 7
+
+
+class Response:
+    """
+    Push decoder for one HTTP/1.1 response.
+
+    Bytes are fed as they arrive. Header lines are assembled in a fixed line
+    buffer (longer lines are truncated, none of the headers used here come
+    close), and body bytes are handed to the sink without being copied.
+    """
+
+    def __init__(self, line=128):
+        # type: (int) -> None
+        """
+        Initialize the decoder.
+
+        Args:
+            line (int): Size of the header line buffer.
+        """
+        self._line = bytearray(line)
+        self.begin()
+
+    def begin(self, head=False, sink=None, max_body=None):
+        # type: (bool, function, int) -> None
+        """
+        Prepare for a new response.
+
+        Args:
+            head (bool): The request was HEAD, so no body follows.
+            sink (function): Called as sink(buf, start, end) with body bytes
+                of a 2xx response.
+            max_body (int): Largest accepted body in bytes, None for no cap.
+        """
+        self.head = head
+        self.sink = sink
+        self.max_body = max_body
+        self.status = None
+        self.length = None
+        self.chunked = False
+        self.keep_alive = True
+        self.received = 0
+        self.done = False
+        self._state = _STATUS
+        self._n = 0  # Bytes in the line buffer
+        self._left = None  # Bytes left in the body or chunk
+
+    def feed(self, buf, i, n):
+        # type: (bytearray, int, int) -> int
+        """
+        Decode the bytes buf[i:n].
+
+        Returns:
+            int: Index after the last byte consumed.
+
+        Raises:
+            OSError: If the response is malformed or the body is too large.
+        """
+        while i < n and not self.done:
+            state = self._state
+            if state == _BODY or state == _CHUNK_DATA:
+                end = n if self._left is None else min(n, i + self._left)
+                self._data(buf, i, end)
+                if self._left is not None:
+                    self._left -= end - i
+                    if not self._left:
+                        if state == _BODY:
+                            self._finish()
+                        else:
+                            self._state = _CHUNK_END
+                i = end
+                continue
+            c = buf[i]
+            i += 1
+            if c == 0x0A:  # '\n'
+                self._line_done()
+                self._n = 0
+            elif c != 0x0D and self._n < len(self._line):
+                self._line[self._n] = c
+                self._n += 1
+
+        return i
+
+    def eof(self):
+        # type: () -> None
+        """
+        Handle the server closing the connection.
+
+        Raises:
+            OSError: If the response was not complete.
+        """
+        if self._state == _BODY and self._left is None:
+            self._finish()
+        elif not self.done:
+            raise OSError("Truncated response")
+
+    def _finish(self):
+        # type: () -> None
+        self._state = _DONE
+        self.done = True
+
+    def _data(self, buf, i, n):
+        # type: (bytearray, int, int) -> None
+        """
+        Pass body bytes to the sink, enforcing the body cap.
+        """
+        self.received += n - i
+        if self.max_body is not None and self.received > self.max_body:
+            raise OSError("Response body too large")
+        if self.sink is not None and 200 <= self.status < 300:
+            self.sink(buf, i, n)
+
+    def _line_done(self):
+        # type: () -> None
+        """
+        Handle a complete line in the line buffer.
+        """
+        line = self._line
+        n = self._n
+        state = self._state
+        if state == _STATUS:
+            if n < 12 or line[:5] != b"HTTP/":
+                raise OSError("Invalid status line")
+            self.status = int(bytes(line[9:12]))
+            self.keep_alive = line[5:8] != b"1.0"
+            self._state = _HEADER
+        elif state == _HEADER:
+            if n:
+                self._header(bytes(line[:n]))
+            else:
+                self._start_body()
+        elif state == _CHUNK_SIZE:
+            size = bytes(line[:n]).split(b";")[0].strip()
+            self._left = int(size, 16)
+            self._state = _CHUNK_DATA if self._left else _TRAILER
+        elif state == _CHUNK_END:
+            self._state = _CHUNK_SIZE
+        elif state == _TRAILER and not n:
+            self._finish()
+
+    def _header(self, line):
+        # type: (bytes) -> None
+        """
+        Record the headers that control how the body is read.
+        """
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        value = value.strip().lower()
+        if name == b"content-length":
+            self.length = int(value)
+        elif name == b"transfer-encoding":
+            self.chunked = b"chunked" in value
+        elif name == b"connection":
+            self.keep_alive = value != b"close"
+
+    def _start_body(self):
+        # type: () -> None
+        """
+        Choose how to read the body once the headers are complete.
+        """
+        if self.head or self.status in (204, 304) or self.status < 200:
+            self._finish()
+        elif self.chunked:
+            self._state = _CHUNK_SIZE
+        elif self.length is not None:
+            if self.max_body is not None and self.length > self.max_body:
+                raise OSError("Response body too large")
+            self._left = self.length
+            self._state = _BODY
+            if not self.length:
+                self._finish()
+        else:  # Body ends when the server closes
+            self.keep_alive = False
+            self._state = _BODY
+
+
+class HTTPClient:
+    """
+    HTTP/1.1 client with one keep-alive connection and fixed buffers.
+
+    Requests to the host of the open connection reuse it, which saves DNS,
+    TCP and, for https, the TLS handshake. A request to another host closes
+    the connection and opens a new one.
+    """
+
+    def __init__(self, connect_timeout=5, read_timeout=10, chunk=256, max_body=32768):
+        # type: (int, int, int, int) -> None
+        """
+        Initialize the client.
+
+        Args:
+            connect_timeout (int): Timeout in seconds for DNS-resolved connect.
+            read_timeout (int): Timeout in seconds for each read and write.
+            chunk (int): Size of the receive buffer.
+            max_body (int): Largest accepted body in bytes.
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_body = max_body
+        self._buf = bytearray(chunk)
+        self._response = Response()
+        self._sock = None
+        self._origin = None  # (scheme, host, port) of the open connection
+        self._started = False  # A response has begun on the current request
+        self.connects = 0
+        self.requests = 0
+
+    @staticmethod
+    def _split(url):
+        # type: (str) -> tuple
+        """
+        Split a URL into origin and path.
+
+        Returns:
+            tuple: ((scheme, host, port), path)
+        """
+        scheme, _, rest = url.partition("://")
+        host, _, path = rest.partition("/")
+        port = 443 if scheme == "https" else 80
+        if ":" in host:
+            host, _, port = host.partition(":")
+            port = int(port)
+
+        return (scheme, host, port), "/" + path
+
+    def _connect(self, origin):
+        # type: (tuple) -> None
+        """
+        Open a connection, wrapping it in TLS for https.
+        """
+        self.close()
+        scheme, host, port = origin
+        addr = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0][-1]
+        sock = socket.socket()
+        try:
+            sock.settimeout(self.connect_timeout)
+            sock.connect(addr)
+            sock.settimeout(self.read_timeout)
+            if scheme == "https":
+                if tls is not None:
+                    ctx = tls.SSLContext(tls.PROTOCOL_TLS_CLIENT)
+                    ctx.verify_mode = tls.CERT_NONE
+                    sock = ctx.wrap_socket(sock, server_hostname=host)
+                else:
+                    sock = ssl.wrap_socket(sock, server_hostname=host)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._origin = origin
+        self.connects += 1
+
+    def close(self):
+        # type: () -> None
+        """
+        Close the connection if one is open.
+        """
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            self._origin = None
+
+    def request(self, method, url, sink=None):
+        # type: (str, str, function) -> int
+        """
+        Send a request and read the response.
+
+        Args:
+            method (str): "GET" or "HEAD".
+            url (str): Absolute http or https URL.
+            sink (function): Called as sink(buf, start, end) with each piece
+                of a 2xx response body. Other bodies are read and discarded
+                so the connection stays usable.
+
+        Returns:
+            int: HTTP status code.
+
+        Raises:
+            OSError: If the connection fails, times out, or the response is
+                malformed or exceeds max_body.
+        """
+        origin, path = self._split(url)
+        reused = self._sock is not None and self._origin == origin
+        if not reused:
+            self._connect(origin)
+        self.requests += 1
+        try:
+            return self._exchange(method, origin[1], path, sink)
+        except OSError:
+            self.close()
+            if not reused or self._started:
+                raise
+        # The server closed the idle connection: retry once on a new one
+        self._connect(origin)
+        try:
+            return self._exchange(method, origin[1], path, sink)
+        except OSError:
+            self.close()
+            raise
+
+    @staticmethod
+    def _head(method, host, path):
+        # type: (str, str, str) -> bytes
+        """
+        Format the request line and headers.
+        """
+        return (
+            f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+            "User-Agent: kwh_display\r\nAccept: application/json\r\n"
+            "Connection: keep-alive\r\n\r\n".encode()
+        )
+
+    def _exchange(self, method, host, path, sink):
+        # type: (str, str, str, function) -> int
+        """
+        Write one request and read its response on the open connection.
+        """
+        sock = self._sock
+        buf = self._buf
+        response = self._response
+        response.begin(method == "HEAD", sink, self.max_body)
+        self._started = False
+        sock.write(self._head(method, host, path))
+        while not response.done:
+            n = sock.readinto(buf)
+            if not n:
+                if not self._started:
+                    raise OSError("Connection closed by server")
+                response.eof()
+                break
+            self._started = True
+            response.feed(buf, 0, n)
+
+        if not response.keep_alive:
+            self.close()
+
+        return response.status
+
+
+class AsyncHTTPClient(HTTPClient):
+    """
+    HTTPClient for asyncio tasks.
+
+    Connects and reads yield to other tasks instead of blocking the event
+    loop. The response is decoded by the same Response decoder with the same
+    fixed buffers. Only the DNS lookup inside the connect blocks.
+    """
+
+    @staticmethod
+    async def _wait(coro, timeout):
+        # type: (object, int) -> object
+        """
+        Await coro, raising OSError like a socket timeout after timeout seconds.
+        """
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            raise OSError(errno.ETIMEDOUT)
+
+    async def _connect(self, origin):
+        # type: (tuple) -> None
+        """
+        Open a connection, wrapping it in TLS for https.
+        """
+        self.close()
+        scheme, host, port = origin
+        ctx = None
+        if scheme == "https":
+            if tls is not None:
+                ctx = tls.SSLContext(tls.PROTOCOL_TLS_CLIENT)
+                ctx.verify_mode = tls.CERT_NONE
+            else:
+                ctx = True
+        self._sock, _ = await self._wait(  # Reader and writer are one stream
+            asyncio.open_connection(host, port, ssl=ctx), self.connect_timeout
+        )
+        self._origin = origin
+        self.connects += 1
+
+    def close(self):
+        # type: () -> None
+        """
+        Close the connection if one is open. Stream.close() of asyncio only
+        marks the stream, the socket is closed by wait_closed(), so close the
+        socket of the stream directly as wait_closed() does.
+        """
+        if self._sock is not None:
+            self._sock.s.close()
+            self._sock = None
+            self._origin = None
+
+    async def request(self, method, url, sink=None):
+        # type: (str, str, function) -> int
+        """
+        Send a request and read the response. See HTTPClient.request.
+        """
+        origin, path = self._split(url)
+        reused = self._sock is not None and self._origin == origin
+        if not reused:
+            await self._connect(origin)
+        self.requests += 1
+        try:
+            return await self._exchange(method, origin[1], path, sink)
+        except OSError:
+            self.close()
+            if not reused or self._started:
+                raise
+        # The server closed the idle connection: retry once on a new one
+        await self._connect(origin)
+        try:
+            return await self._exchange(method, origin[1], path, sink)
+        except OSError:
+            self.close()
+            raise
+
+    async def _exchange(self, method, host, path, sink):
+        # type: (str, str, str, function) -> int
+        """
+        Write one request and read its response on the open connection.
+        """
+        stream = self._sock
+        buf = self._buf
+        response = self._response
+        response.begin(method == "HEAD", sink, self.max_body)
+        self._started = False
+        stream.write(self._head(method, host, path))
+        await self._wait(stream.drain(), self.read_timeout)
+        while not response.done:
+            n = await self._wait(stream.readinto(buf), self.read_timeout)
+            if not n:
+                if not self._started:
+                    raise OSError("Connection closed by server")
+                response.eof()
+                break
+            self._started = True
+            response.feed(buf, 0, n)
+
+        if not response.keep_alive:
+            self.close()
+
+        return response.status
@@ -2,16 +2,22 @@
 Initialise drivers for hardware ILI9341 display.
 """
 
-import cmath
 import ujson
 from gui.fonts import arial10, arial35, freesans20
 from gui.core.writer import CWriter
-from gui.core.fplot import CartesianGraph, TSequence
+from gui.core.fplot import CartesianGraph, Curve
 from gui.core.nanogui import refresh
 from gui.widgets.label import Label
 from gui.core.colors import WHITE, BLACK, GREY, RED, GREEN, YELLOW
 from gui.widgets.dial import Dial, Pointer
 from gui.color_setup import ssd
+from app.stats import day_stats
+from app.plan import RenderPlan
+from app.timeline import Timeline, NO_PRICES
+
+PRICE_LEVELS = ("Billigt", "Normalt", "Dyrt")
+LEVEL_COLORS = (GREEN, YELLOW, RED)
+DAY_COLORS = (RED, RED, YELLOW)  # Yesterday, today and tomorrow in a timeline
 
 
 class GUI:
@@ -28,6 +34,24 @@ class GUI:
         with open("config.json", "r") as f:
             self.config = ujson.load(f)
 
+        self.config_error = None
+        try:
+            if "billigt<%" in self.config:  # Percentiles of the day's prices
+                self.thresholds = (
+                    int(self.config["billigt<%"]),
+                    int(self.config["normalt<%"]),
+                )
+                self.relative = True
+            else:  # Thresholds in öre, compared with the integer price series
+                self.thresholds = (
+                    round(self.config["billigt<"] * 100),
+                    round(self.config["normalt<"] * 100),
+                )
+                self.relative = False
+        except (TypeError, KeyError, ValueError) as e:
+            self.thresholds = None
+            self.config_error = e
+
         y_axis_division = [249, 225, 202, 179, 155]
         x_axis_division = [15, 30, 48, 66, 83, 98, 115, 133, 150, 168, 186, 204]
         arrows_division = [
@@ -57,8 +81,12 @@ class GUI:
             218,
         ]
         self.arrows = {}
+        self.arrow = None  # Hour of the arrow shown
+        self.arrow_x = arrows_division
 
         self.ssd = ssd
+        self.deferred = False  # Leave copying frames to the display to flush()
+        self.dirty = False  # A deferred frame is waiting for flush()
         refresh(self.ssd, True)  # Clear any prior image
 
         Label(
@@ -103,8 +131,20 @@ class GUI:
             xdivs=12,
             ydivs=12,
         )
-        self.ts_red = TSequence(self.graph, RED, 96, 0, 5)
-        self.ts_yellow = TSequence(self.graph, YELLOW, 96, 0, 5)
+        # x in slots with the last slot at the origin, the x excursion is set
+        # to the slots of each day when plotted, y in öre (0-5 SEK)
+        self.ts_red = Curve(self.graph, RED, excursion=(96, 500))
+        self.ts_yellow = Curve(self.graph, YELLOW, excursion=(96, 500))
+        self.day_slots = 96  # Slots today, 92 or 100 on DST transition days
+        # Minutes per point of the 24h graph, coarser when a day has more
+        # slots than the graph has room for at two pixels per point
+        self.graph_minutes = self.config.get("graph_minutes", 15)
+        self.max_points = 210 // 2
+        # "24h" overlays today and tomorrow, "48h" shows them after each other
+        # and "continuous" shows from 12 hours ago to 36 hours ahead
+        self.mode = self.config.get("graph", "24h")
+        self.timelines = {}  # Timeline by zone in the 48h and continuous modes
+        self.now = 0  # Minutes since midnight at the start of the slot shown
         self.color_label = Label(
             CWriter(self.ssd, arial35, GREEN, BLACK, verbose=False),
             40,
@@ -119,9 +159,28 @@ class GUI:
             "0.00",
             align=2,
         )
-
+        self.zone = None  # Bidding zone on the display
+        self.loads_label = None
+        if self.config.get("loads"):  # Next start of each load, under the level
+            self.loads_label = Label(self.wri, 77, 105, 130, align=0)
+        self.stats_label = None
+        if self.config.get("stats", False):  # Optional panel below the graph
+            self.stats_label = Label(self.wri, 304, 4, 232, align=0)
+        self.zone_label = Label(self.wri, 8, 195, 30, align=2)
+
+        self.hour_labels = []  # Moved to the hours of each day in the 24h graph
+        self.labelled = None  # (date, slots) the 24h graph is labelled for
         for x_label, x_axis_division in enumerate(x_axis_division):
-            Label(self.wri, 289, x_axis_division, str((x_label * 2)), align=2)
+            if self.mode == "48h":
+                hour = x_label * 4 % 24
+            elif self.mode == "continuous":
+                hour = x_label * 4 - 12  # Hours from now
+            else:
+                hour = x_label * 2
+            label = Label(self.wri, 289, x_axis_division, str(hour), align=2)
+            self.hour_labels.append(label)
+        if self.mode == "24h":  # A 25-hour day has a 13th label, blank until then
+            self.hour_labels.append(Label(self.wri, 289, 218, 1, align=2))
 
         for y_label, y_axis_division in enumerate(y_axis_division):
             Label(self.wri, y_axis_division, 4, str((y_label)), align=2)
@@ -130,6 +189,25 @@ class GUI:
             arrow_label = Label(self.wri, 279, arrow, "^", fgcolor=BLACK, align=2)
             self.arrows[f"arrow_{hour}"] = arrow_label
 
+    def _refresh(self):
+        # type: () -> None
+        """
+        Draw pending objects and copy the frame to the display, or only mark
+        it dirty when in deferred mode.
+        """
+        refresh(self.ssd, show=not self.deferred)
+        self.dirty = self.deferred
+
+    async def flush(self):
+        # type: () -> None
+        """
+        Copy a deferred frame to the display in segments, yielding to other
+        asyncio tasks between them.
+        """
+        if self.dirty:
+            self.dirty = False
+            await self.ssd.do_refresh()
+
     @staticmethod
     def set_error(e):
         # type: (Exception) -> None
@@ -156,67 +234,242 @@ class GUI:
 
         refresh(ssd)
 
-    def plot_prices(self, prices_today, prices_tomorrow):
-        # type: (list, list) -> None
+    def show_zone(
+        self, zone, prices_today, prices_tomorrow, current_15min, prices_yesterday=None
+    ):
+        # type: (str, dict, dict, int, dict) -> None
+        """
+        Switch the display to the prices of one bidding zone.
+
+        Args:
+            zone (str): Bidding zone to show.
+            prices_today (dict): Todays PriceSeries by zone.
+            prices_tomorrow (dict): Tomorrows PriceSeries by zone.
+            current_15min (int): 15-minute interval now
+            prices_yesterday (dict): Yesterdays PriceSeries by zone, shown
+                in the continuous graph.
+        """
+        self.zone = zone
+        self.now = current_15min * 15
+        self.zone_label.value(zone)
+        yesterday = None if prices_yesterday is None else prices_yesterday.get(zone)
+        self.plot_prices(prices_today.get(zone), prices_tomorrow.get(zone), yesterday)
+        self.set_price(current_15min, prices_today.get(zone))
+
+    def plot_prices(self, prices_today, prices_tomorrow, prices_yesterday=None):
+        # type: (PriceSeries, PriceSeries, PriceSeries) -> None
         """
         Plot spot prices in the graph
 
         Args:
-            prices_today (dict): Todays spot prices fetched from api.
-            prices_tomorrow (dict): Tomorrows spot prices fetched from api.
+            prices_today (PriceSeries): Todays spot prices fetched from api.
+            prices_tomorrow (PriceSeries): Tomorrows spot prices fetched from api.
+            prices_yesterday (PriceSeries): Yesterdays spot prices, only shown
+                in the continuous graph.
         """
-        for today, tomorrow in zip(
-            prices_today,
-            prices_tomorrow if prices_tomorrow else [None] * len(prices_today),
-        ):
+        if self.mode != "24h":
+            self._timeline().load(prices_today, prices_tomorrow, prices_yesterday)
+            self._plot_timeline()
+        else:
             self.graph.clear()
-            self.ts_red.add(today)
-            if tomorrow is not None:
-                self.ts_yellow.add(tomorrow)
+            if prices_today is not None:
+                self._plot(self.ts_red, prices_today)
+            if prices_tomorrow is not None:
+                self._plot(self.ts_yellow, prices_tomorrow)
+        if prices_today is not None:
+            self.day_slots = len(prices_today)
+            self.set_stats(prices_today)
+            if self.mode == "24h":
+                self._label_hours(prices_today)
+
+        self._refresh()
+
+    def set_stats(self, prices_today):
+        # type: (PriceSeries) -> None
+        """
+        Show the lowest, mean and highest price of the day in the stats
+        panel, with the time of the extremes. The statistics are computed
+        when the series is loaded, so this only formats them.
+
+        Args:
+            prices_today (PriceSeries): Todays spot prices.
+        """
+        if self.stats_label is None:
+            return
+        stats = day_stats(prices_today)
+        low = prices_today.time(stats.argmin)
+        high = prices_today.time(stats.argmax)
+        self.stats_label.value(
+            "Min {:.2f} ({:02}:{:02})  Snitt {:.2f}  Max {:.2f} ({:02}:{:02})".format(
+                stats.min / 100,
+                low[0],
+                low[1],
+                stats.mean / 100,
+                stats.max / 100,
+                high[0],
+                high[1],
+            )
+        )
+
+    def set_loads(self, recommendations, prices_today):
+        # type: (list, PriceSeries) -> None
+        """
+        Show the recommended start time of each configured load.
+
+        Args:
+            recommendations (list): (name, start slot or None) per load, the
+                slots counted from the start of today.
+            prices_today (PriceSeries): Todays prices, to get the local time
+                of a slot.
+        """
+        if self.loads_label is None:
+            return
+        parts = []
+        for name, start in recommendations:
+            if start is None:
+                parts.append(f"{name} -")
+            else:
+                t = prices_today.time(start)
+                parts.append("{} {:02}:{:02}".format(name, t[0], t[1]))
+        self.loads_label.value("  ".join(parts))
+        self._refresh()
+
+    def plot_tomorrow(self, prices_tomorrow):
+        # type: (PriceSeries) -> None
+        """
+        Add tomorrow's prices to the graph, leaving today's curve in place.
+
+        Args:
+            prices_tomorrow (PriceSeries): Tomorrows spot prices fetched from api.
+        """
+        if self.mode != "24h":
+            timeline = self._timeline()
+            timeline.load(timeline.series[1], prices_tomorrow)
+            self._plot_timeline()
+        else:
+            self._plot(self.ts_yellow, prices_tomorrow)
 
-        refresh(self.ssd)
+        self._refresh()
+
+    def _timeline(self):
+        # type: () -> Timeline
+        """
+        Get the timeline of the zone on display, creating it on first use.
+        """
+        timeline = self.timelines.get(self.zone)
+        if timeline is None:
+            before = 12 if self.mode == "continuous" else None
+            timeline = Timeline(self.graph.width, 48, before)
+            self.timelines[self.zone] = timeline
+
+        return timeline
+
+    def _plot_timeline(self):
+        # type: () -> None
+        """
+        Draw the timeline of the zone on display as one vertical span per
+        pixel column, from the lowest to the highest price in the column.
+        """
+        graph = self.graph
+        timeline = self._timeline()
+        timeline.update(self.now)
+        graph.clear()
+        scale = graph.y_axis_len / self.ts_red.excursion[1]  # Pixels per öre
+        top = graph.y0
+        bottom = graph.y1 - 1
+        days = timeline.days
+        lows = timeline.lows
+        highs = timeline.highs
+        for c in range(timeline.width):
+            day = days[c]
+            if day == NO_PRICES:
+                continue
+            y0 = min(max(round(graph.yp_origin - highs[c] * scale), top), bottom)
+            y1 = min(max(round(graph.yp_origin - lows[c] * scale), top), bottom)
+            self.ssd.vline(graph.x0 + c, y0, y1 - y0 + 1, DAY_COLORS[day])
+
+    def _slot_x(self, slot, slots):
+        # type: (int, int) -> int
+        """
+        Get the x of a slot in the 24h graph, where a day of any number of
+        slots spans the width of the graph.
+        """
+        return self.graph.x0 + (slot + 1) * self.graph.width // slots
+
+    def _label_hours(self, prices_today):
+        # type: (PriceSeries) -> None
+        """
+        Label the x-axis of the 24h graph every two hours from midnight,
+        each label at the slot the hour starts and showing its local hour.
+        On DST days these differ from fixed hours: 23 or 25 hours share the
+        width, and the hour after 01 is 03 or 02 again.
+
+        Args:
+            prices_today (PriceSeries): Todays prices.
+        """
+        slots = len(prices_today)
+        if self.labelled == (prices_today.date, slots):
+            return
+        self.labelled = (prices_today.date, slots)
+        row = self.hour_labels[0].row
+        self.ssd.fill_rect(0, row, self.ssd.width, self.wri.height, BLACK)
+        arrow = self.wri.stringlen("^")
+        for i, label in enumerate(self.hour_labels):
+            slot = i * 8
+            if slot >= slots:
+                break
+            text = str(prices_today.time(slot)[0])
+            label.width = self.wri.stringlen(text)
+            label.col = self._slot_x(slot, slots) - (label.width - arrow) // 2
+            label.value(text)
+
+    def _plot(self, curve, series):
+        # type: (Curve, PriceSeries) -> None
+        """
+        Draw a series as one curve, the last slot at the graph origin. The
+        curve has a point per graph_minutes, the mean of the slots in it,
+        and never more points than max_points, so the lines drawn are
+        bounded whatever the slot count. The day spans the width of the
+        graph also when it has 92 or 100 slots.
+        """
+        curve.excursion = (len(series), curve.excursion[1])
+        size = max(
+            self.graph_minutes // series.slot, -(-len(series) // self.max_points)
+        )
+        means = series.resample(size)[0]
+        last = (len(means) - 1) * size
+        for i, ore in enumerate(means.values):
+            curve.point(i * size - last, ore)
+        curve.point()
 
     def set_price(self, current_15min, prices_today):
-        # type: (int, list) -> None
+        # type: (int, PriceSeries) -> None
         """
-        Set dynamical objects on the display, showing cost and price.
+        Set dynamical objects on the display, showing cost and price. Levels
+        and texts are looked up in the render plan built once per series.
 
         Args:
-            current_hour (int): Hour now
-            prices_today (list): Spot prices current day
+            current_15min (int): 15-minute interval now
+            prices_today (PriceSeries): Spot prices current day
         """
 
-        price_levels = ("Billigt", "Normalt", "Dyrt")
+        if self.config_error is not None:
+            print(f"Error in config file: {self.config_error}")
+            GUI.set_error(self.config_error)
+            raise self.config_error
 
         try:
-            if prices_today[current_15min] < self.config["billigt<"]:
-                color = GREEN
-                price = price_levels[0]
-            elif (
-                self.config["billigt<"]
-                <= prices_today[current_15min]
-                < self.config["normalt<"]
-            ):
-                color = YELLOW
-                price = price_levels[1]
-            else:
-                color = RED
-                price = price_levels[2]
-        except (TypeError, KeyError, IndexError) as e:
-            print(f"Error in config file: {e}")
+            plan = RenderPlan.of(prices_today, self.thresholds, self.relative)
+            level = plan.levels[current_15min]
+        except (TypeError, IndexError, AttributeError) as e:
+            print(f"Error in price data: {e}")
             GUI.set_error(e)
             raise
 
-        cost = prices_today[current_15min]
-
-        cost = (
-            "{:.1f}".format(cost) if cost >= 10 or cost <= 0 else "{:.2f}".format(cost)
-        )
-
-        self.color_label.value(text=price, fgcolor=color)
-        self.price_label.value(text=cost)
+        self.color_label.value(text=PRICE_LEVELS[level], fgcolor=LEVEL_COLORS[level])
+        self.price_label.value(text=plan.price(current_15min))
 
-        refresh(self.ssd)
+        self._refresh()
 
     def set_arrow(self, current_hour):
         # type: (int) -> None
@@ -226,24 +479,46 @@ class GUI:
         Args:
             current_hour (int): Hour now
         """
-        if current_hour == 0:
-            self.arrows["arrow_23"].value(fgcolor=BLACK)
-        else:
-            self.arrows[f"arrow_{current_hour - 1}"].value(fgcolor=BLACK)
+        if self.arrow is not None:
+            self.arrows[f"arrow_{self.arrow}"].value(fgcolor=BLACK)
 
+        self.arrow = current_hour
         self.arrows[f"arrow_{current_hour}"].value(fgcolor=GREEN)
-        refresh(self.ssd)
+        self._refresh()
+
+    def set_now(self, current_15min):
+        # type: (int) -> None
+        """
+        Mark the current slot. The arrow points at the hour, or at now in
+        the timeline, which also moves the window of a continuous timeline.
+
+        Args:
+            current_15min (int): 15-minute interval now
+        """
+        self.now = current_15min * 15
+        if self.mode == "24h":  # The arrow nearest the start of the hour
+            x = self._slot_x(current_15min - current_15min % 4, self.day_slots)
+        else:
+            timeline = self._timeline()
+            if timeline.before is not None:
+                self._plot_timeline()
+            x = self.graph.x0 + timeline.column(self.now)
+        nearest = min(range(len(self.arrow_x)), key=lambda i: abs(self.arrow_x[i] - x))
+        self.set_arrow(nearest)
 
     def set_clock(self):
         # type: () -> tuple
         """
         Instantiate variables needed to display analog clock.
 
+        The hands run in clock mode: their endpoints are looked up in integer
+        tables built once here, 720 positions for the hour hand (one per minute
+        of a 12-hour turn) and 60 for the minute and second hands. The dial
+        caches its static face so a tick only redraws the hands.
+
         Returns:
             tuple: analog clock parameters
         """
-        uv = lambda phi: cmath.rect(1, phi)
-        pi = cmath.pi
         days = (
             "Mandag",
             "Tisdag",
@@ -269,14 +544,18 @@ class GUI:
         )
 
         dial = Dial(
-            self.wri, 25, 15, height=90, ticks=12, bdcolor=WHITE, label=90, pip=False
+            self.wri,
+            25,
+            15,
+            height=90,
+            ticks=12,
+            bdcolor=WHITE,
+            label=90,
+            pip=False,
+            cache=True,
         )
-        hrs = Pointer(dial)
-        mins = Pointer(dial)
-        secs = Pointer(dial)
-
-        hstart = 0 + 0.7j
-        mstart = 0 + 0.92j
-        sstart = 0 + 0.92j
+        hrs = Pointer(dial, 0.7, 720)
+        mins = Pointer(dial, 0.92, 60)
+        secs = Pointer(dial, 0.92, 60)
 
-        return uv, pi, days, months, dial, hrs, mins, secs, hstart, mstart, sstart
+        return days, months, dial, hrs, mins, secs
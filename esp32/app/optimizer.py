@@ -0,0 +1,176 @@
+"""
+Find the cheapest time to run a load, such as a dishwasher or an EV charger.
+
+This module includes a class and functions to:
+- Find the cheapest window starting at or after any slot with a table lookup
+- Find the cheapest k slots at or after any slot, contiguous or not
+- Plan the configured loads over today's and tomorrow's prices
+"""
+
+from array import array
+from app.analytics import window_sums
+
+
+def suffix_argmin(sums):
+    # type: (array) -> array
+    """
+    Get, for every slot, the start of the cheapest window that starts at or
+    after it. Ties go to the earlier window.
+
+    Args:
+        sums (array): Window sums from window_sums.
+
+    Returns:
+        array: Start slot of the cheapest window from each slot.
+    """
+    n = len(sums)
+    best = array("h", bytes(2 * n))
+    b = n - 1
+    for i in range(n - 1, -1, -1):
+        if sums[i] <= sums[b]:
+            b = i
+        best[i] = b
+
+    return best
+
+
+def cheapest_slots(ranking, k, start=0):
+    # type: (list, int, int) -> list
+    """
+    Get the k cheapest slots at or after start.
+
+    Args:
+        ranking (list): Slots ordered from cheapest to most expensive.
+        k (int): Number of slots.
+        start (int): First slot that may be used.
+
+    Returns:
+        list: The slots in time order, fewer than k if not enough remain.
+    """
+    chosen = []
+    for slot in ranking:
+        if slot >= start:
+            chosen.append(slot)
+            if len(chosen) == k:
+                break
+    chosen.sort()
+
+    return chosen
+
+
+class LoadPlanner:
+    """
+    Cheapest start times for the loads in config.json.
+
+    Tables are rebuilt only when the prices change: window sums with their
+    suffix minimum for contiguous loads, and one ranking of the slots for
+    loads that can be split. Asking for the next start at a given slot is
+    then a lookup or a short scan.
+    """
+
+    def __init__(self, loads, slot=15):
+        # type: (list, int) -> None
+        """
+        Initialize the planner.
+
+        Args:
+            loads (list): Dicts with "name", "minutes" and optionally
+                "contiguous" (default True), as in config.json.
+            slot (int): Slot duration in minutes.
+        """
+        self.loads = [
+            (
+                load["name"],
+                max(1, -(-load["minutes"] // slot)),  # Whole slots, rounded up
+                load.get("contiguous", True),
+            )
+            for load in loads
+        ]
+        self._prices = None  # (today, tomorrow) the tables were built for
+        self._tables = []
+
+    @classmethod
+    def from_config(cls, config):
+        # type: (dict) -> LoadPlanner
+        """
+        Create the planner from the "loads" key of config.json.
+
+        Returns:
+            LoadPlanner: The planner, or None if no loads are configured.
+        """
+        loads = config.get("loads")
+
+        return cls(loads) if loads else None
+
+    def update(self, prices_today, prices_tomorrow):
+        # type: (PriceSeries, PriceSeries) -> bool
+        """
+        Rebuild the tables if the prices changed.
+
+        Args:
+            prices_today (PriceSeries): The prices for today.
+            prices_tomorrow (PriceSeries): The prices for tomorrow, or None.
+
+        Returns:
+            bool: True if the tables were rebuilt.
+        """
+        if (
+            self._prices is not None
+            and self._prices[0] is prices_today
+            and self._prices[1] is prices_tomorrow
+        ):
+            return False
+        self._prices = (prices_today, prices_tomorrow)
+        self._tables = []
+        if prices_today is None:
+            return True
+
+        values = prices_today.values
+        if prices_tomorrow is not None:
+            values = values + prices_tomorrow.values
+        ranking = None
+        for _, k, contiguous in self.loads:
+            if contiguous:
+                self._tables.append(suffix_argmin(window_sums(values, k)))
+            else:
+                if ranking is None:
+                    ranking = sorted(range(len(values)), key=lambda j: values[j])
+                self._tables.append(ranking)
+
+        return True
+
+    def next_start(self, i, now):
+        # type: (int, int) -> int
+        """
+        Get the recommended start of a load.
+
+        Args:
+            i (int): Index of the load.
+            now (int): Current slot of today.
+
+        Returns:
+            int: Start slot, counted from the start of today, or None if the
+                load no longer fits in the known prices.
+        """
+        if not self._tables:
+            return None
+        _, k, contiguous = self.loads[i]
+        table = self._tables[i]
+        if contiguous:
+            return table[now] if now < len(table) else None
+        slots = cheapest_slots(table, k, now)
+
+        return slots[0] if len(slots) == k else None
+
+    def recommendations(self, now):
+        # type: (int) -> list
+        """
+        Get the recommended start of every load.
+
+        Args:
+            now (int): Current slot of today.
+
+        Returns:
+            list: (name, start slot or None) per load.
+        """
+        return [(load[0], self.next_start(i, now)) for i, load in enumerate(self.loads)]
@@ -0,0 +1,86 @@
+"""
+A per-slot render plan for the price level and price text.
+
+This module includes a class to:
+- Classify every slot of a day as cheap, normal or expensive, with fixed
+  thresholds or with percentiles of the day's prices
+- Format the price text of every slot once into a fixed-width buffer
+- Cache the plan with the series so a slot change is a table lookup
+"""
+
+from app.stats import day_stats
+
+CHEAP = 0
+NORMAL = 1
+EXPENSIVE = 2
+
+_WIDTH = 6  # Characters per slot, "-327.7" is the longest price in öre range
+
+
+class RenderPlan:
+    """
+    Level and price text of every slot of a PriceSeries.
+    """
+
+    def __init__(self, series, cheap, normal):
+        # type: (PriceSeries, int, int) -> None
+        """
+        Classify and format every slot.
+
+        Args:
+            series (PriceSeries): The prices of one day.
+            cheap (int): Prices below this in öre are cheap.
+            normal (int): Other prices below this in öre are normal.
+        """
+        n = len(series)
+        self.cheap = cheap
+        self.normal = normal
+        self.levels = bytearray(n)
+        self.text = bytearray(b" " * (n * _WIDTH))
+        for i in range(n):
+            ore = series[i]
+            if ore < cheap:
+                self.levels[i] = CHEAP
+            elif ore < normal:
+                self.levels[i] = NORMAL
+            else:
+                self.levels[i] = EXPENSIVE
+            cost = ore / 100
+            cost = (
+                "{:.1f}".format(cost)
+                if cost >= 10 or cost <= 0
+                else "{:.2f}".format(cost)
+            )
+            self.text[i * _WIDTH : i * _WIDTH + len(cost)] = cost.encode()
+
+    @classmethod
+    def of(cls, series, thresholds, percentile=False):
+        # type: (PriceSeries, tuple, bool) -> RenderPlan
+        """
+        Get the plan of a series, building it on first use.
+
+        Args:
+            series (PriceSeries): The prices of one day.
+            thresholds (tuple): (cheap, normal) in öre, or percentiles of the
+                day's prices when percentile is True.
+            percentile (bool): Thresholds are relative to the day.
+
+        Returns:
+            RenderPlan: The plan cached on the series.
+        """
+        if series.plan is None:
+            cheap, normal = thresholds
+            if percentile:
+                stats = day_stats(series, thresholds)
+                cheap = stats.percentiles[cheap]
+                normal = stats.percentiles[normal]
+            series.plan = cls(series, cheap, normal)
+
+        return series.plan
+
+    def price(self, i):
+        # type: (int) -> str
+        """
+        Get the price text of a slot in SEK/kWh.
+        """
+        return str(self.text[i * _WIDTH : (i + 1) * _WIDTH], "ascii").rstrip()
@@ -0,0 +1,90 @@
+"""
+A polling policy for resources that appear at an unknown time.
+
+This module includes a class to:
+- Decide when the next poll is due using time.ticks_ms deadlines
+- Back off exponentially while the resource is missing, with random jitter
+"""
+
+import time
+import random
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter.
+
+    The delay starts at interval, is multiplied by factor after every miss
+    up to max_interval, and is spread by up to +-jitter of its length so that
+    many devices do not poll in step.
+    """
+
+    def __init__(self, interval=60, max_interval=900, factor=2, jitter=0.2):
+        # type: (float, float, int, float) -> None
+        """
+        Initialize the policy. The first poll is due immediately.
+
+        Args:
+            interval (float): First delay in seconds.
+            max_interval (float): Longest delay in seconds.
+            factor (int): Growth of the delay after each miss.
+            jitter (float): Relative random spread of each delay.
+        """
+        self.interval = int(interval * 1000)
+        self.max_interval = int(max_interval * 1000)
+        self.factor = factor
+        self.jitter = jitter
+        self.misses = 0
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config):
+        # type: (dict) -> Backoff
+        """
+        Create a policy from the poll_* keys of config.json.
+        """
+        return cls(
+            config.get("poll_interval", 60),
+            config.get("poll_max_interval", 900),
+            config.get("poll_factor", 2),
+            config.get("poll_jitter", 0.2),
+        )
+
+    def reset(self):
+        # type: () -> None
+        """
+        Make the next poll due immediately and restart at the first delay.
+        """
+        self.misses = 0
+        self.delay = 0
+        self._next = time.ticks_ms()
+
+    def due(self):
+        # type: () -> bool
+        """
+        Check if a poll is due.
+        """
+        return time.ticks_diff(time.ticks_ms(), self._next) >= 0
+
+    def miss(self):
+        # type: () -> int
+        """
+        Record a poll that did not find the resource and schedule the next.
+
+        Returns:
+            int: Delay until the next poll in milliseconds.
+        """
+        delay = self.interval
+        for _ in range(self.misses):
+            delay = int(delay * self.factor)
+            if delay >= self.max_interval:
+                delay = self.max_interval
+                break
+        self.misses += 1
+        spread = int(delay * self.jitter)
+        if spread:
+            delay += random.getrandbits(16) * 2 * spread // 65536 - spread
+        self.delay = delay
+        self._next = time.ticks_add(time.ticks_ms(), delay)
+
+        return delay
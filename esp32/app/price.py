@@ -5,11 +5,18 @@ Instantiates class to fetch spot prices.
 import ujson
 import machine
 import gc
-import os
-import urequests
 import time as pytime
-from app.ili9341 import GUI
-from datetime import timedelta
+from array import array
+from app.stream import PriceParser
+from app.series import PriceSeries
+from app.cache import PriceCache
+from app.poll import Backoff
+from app.http import HTTPClient, AsyncHTTPClient
+from app.stats import day_stats
+from app.tariff import Tariff
+
+_MIN_SLOTS = 92  # 15-minute slots on the shortest (DST start) day
+_MAX_SLOTS = 100  # 15-minute slots on the longest (DST end) day
 
 
 class ElectricityPriceAPI:
@@ -17,189 +24,335 @@ class ElectricityPriceAPI:
     Fetch spot prices.
     """
 
-    def __init__(self, utc_time):
-        # type: (datetime) -> None
+    def __init__(self, clock, config=None):
+        # type: (Clock, dict) -> None
         """
         Initialize the ElectricityPriceAPI instance by loading the configuration.
+
+        Args:
+            clock (Clock): Local time snapshot, the API publishes prices per
+                Swedish calendar day.
+            config (dict): Settings, read from config.json if None.
+        """
+        if config is None:
+            with open("config.json", "r") as f:
+                config = ujson.load(f)
+        self.config = config
+
+        self.days = (clock.date(), clock.date(1))
+        # Kept in the cache, and loaded for the graph that starts 12 hours back
+        self.yesterday = clock.date(-1)
+        self.continuous = self.config.get("graph") == "continuous"
+        # Bidding zones to monitor, the first one is shown at boot
+        self.zones = self.config.get("zones") or [self.config["zone"]]
+
+        # Preallocated so a fetch does not grow the heap with the body size
+        self._prices = array("h", bytes(2 * _MAX_SLOTS))
+        self._parser = PriceParser(self._prices)
+        self.cache = PriceCache(keep=4 * len(self.zones))
+        # One keep-alive connection for both days at boot, reused by the
+        # worker thread, and one for the tomorrow probes from the event loop
+        timeouts = (
+            self.config.get("connect_timeout", 5),
+            self.config.get("read_timeout", 10),
+        )
+        self.http = HTTPClient(*timeouts)
+        self.ahttp = AsyncHTTPClient(*timeouts)
+        self.poll = Backoff.from_config(self.config)
+        self.poll_after = self.config.get("poll_after", 13)
+        self.percentiles = tuple(self.config.get("stats_percentiles", (10, 90)))
+        for key in ("billigt<%", "normalt<%"):  # Relative price levels
+            if key in self.config:
+                self.percentiles += (self.config[key],)
+        self.tariff = Tariff.from_config(self.config)
+
+    def _url(self, date, zone=None):
+        # type: (tuple, str) -> str
+        """
+        Get the URL for the API for one day.
+
+        Args:
+            date (tuple): (year, month, day)
+            zone (str): Bidding zone, None for the first configured zone.
+
+        Returns:
+            str: A URL for fetching the electricity prices for the day.
         """
-        with open("config.json", "r") as f:
-            self.config = ujson.load(f)
+        year, month, day = date
+        zone = zone or self.zones[0]
 
-        self.days = (utc_time, utc_time + timedelta(hours=24))
+        return f"{self.config['url']}{self.config['api']}{year:04}/{month:02}-{day:02}_{zone}.json"
 
-    def get_url(self):
-        # type: () -> list
+    def probe(self, day):
+        # type: (tuple) -> bool
         """
-        Get the URL for the API.
+        Check with a HEAD request if the prices for a day are published. The
+        server answers without a body, so a probe costs only the headers.
+
+        Args:
+            day (tuple): (year, month, day)
 
         Returns:
-            list: A list of URLs for fetching the electricity prices.
+            bool: True if the prices can be fetched.
+
+        Raises:
+            OSError: If the connection to the API fails.
         """
-        return [
-            f"{self.config['url']}{self.config['api']}{day.year:04}/{day.month:02}-{day.day:02}_{self.config['zone']}.json"
-            for day in self.days
-        ]
+        return self.http.request("HEAD", self._url(day)) == 200
 
-    def get_url_tomorrow(self, swe_localtime):
-        # type: (datetime) -> str
+    def fetch(self, day, oldest=None, zone=None):
+        # type: (tuple, tuple, str) -> PriceSeries
         """
-        Get the URL for the API for tomorrow which causes desplay to reboot.
+        Fetch the prices for one day from the API and store them in the cache.
+        Zones are parsed one at a time into the same fixed buffer, so peak
+        heap does not grow with the number of zones.
+
+        Args:
+            day (tuple): (year, month, day)
+            oldest (tuple): Cached days before this date are dropped.
+            zone (str): Bidding zone, None for the first configured zone.
 
         Returns:
-            str: A URL for fetching the electricity prices for tomorrow.
+            PriceSeries: The prices, or None if they are not published yet.
 
+        Raises:
+            OSError: If the connection to the API fails.
         """
+        url = self._url(day, zone)
+        print(f"Fetching JSON from: {url}")
+        self._parser.reset()
+        status = self.http.request("GET", url, self._parser.feed)
+
+        return self._fetched(day, zone or self.zones[0], status, oldest)
 
-        tomorrow = swe_localtime + timedelta(hours=24)
+    async def probe_async(self, day):
+        # type: (tuple) -> bool
+        """
+        Like probe, but yields to other asyncio tasks while waiting.
+        """
+        return await self.ahttp.request("HEAD", self._url(day)) == 200
+
+    async def fetch_async(self, day, oldest=None, zone=None):
+        # type: (tuple, tuple, str) -> PriceSeries
+        """
+        Like fetch, but yields to other asyncio tasks while waiting.
+        """
+        url = self._url(day, zone)
+        print(f"Fetching JSON from: {url}")
+        self._parser.reset()
+        status = await self.ahttp.request("GET", url, self._parser.feed)
 
-        return f"{self.config['url']}{self.config['api']}{tomorrow.year:04}/{tomorrow.month:02}-{tomorrow.day:02}_{self.config['zone']}.json"
+        return self._fetched(day, zone or self.zones[0], status, oldest)
 
-    def _get_dst_offset(self, dst_offsets, today):
-        # type: (dict, tuple) -> int
+    def missing_tomorrow(self, clock, have):
+        # type: (Clock, object) -> list
         """
-        Get the Daylight Saving Time (DST) offset for today.
+        Get the zones to poll for tomorrow's prices now. Polls start at
+        poll_after o'clock and follow the backoff policy, so a missing day
+        is polled less and less often instead of on every tick. Shared by
+        utils.check_tomorrow and fetch_tomorrow.
+
         Args:
-            dst_offsets (dict): Dictionary containing DST offsets for each day.
-            today (tuple): Tuple representing today's date (year, month, day).
+            clock (Clock): Local time snapshot.
+            have (object): Zones tomorrow's prices are already loaded for.
+
         Returns:
-            int: The DST offset in hours.
+            list: The zones still missing, empty if no poll is due.
         """
-        last_time_end = dst_offsets[str(today)][-1]
-        tz_part = last_time_end.partition("+0")[2]
-        dst_offset = int(tz_part[0]) if tz_part and tz_part[0].isdigit() else None
-        print(
-            f"Time offset is {dst_offset} hours, {'DST is effect.' if dst_offset == 2 else 'CET in effect.'}"
-        )
+        missing = [zone for zone in self.zones if zone not in have]
+        if not missing or clock.hour < self.poll_after or not self.poll.due():
+            return []
 
-        return dst_offset
+        return missing
 
-    def get_prices(self, utc_time):
-        # type: (datetime) -> None
+    def polled_tomorrow(self, complete):
+        # type: (bool) -> None
+        """
+        Record the outcome of a poll for tomorrow's prices: back off while
+        zones are missing, start over once every zone is fetched.
 
+        Args:
+            complete (bool): Every missing zone was fetched.
         """
-        Fetch prices and DST offset from API and write them to files.
-        Writes:
-            prices_today.json: Today's prices
-            prices_tomorrow.json: Tomorrow's prices
-            dst_offset.json: DST offset information
+        if complete:
+            self.poll.reset()
+            return
+        delay = self.poll.miss()
+        print(f"Prices for tomorrow not available, next check in {delay // 1000} s")
+
+    def fetch_tomorrow(self, clock, fetched):
+        # type: (Clock, dict) -> list
         """
-        failure_count = 0
-        today = (utc_time.year, utc_time.month, utc_time.day)
-        tomorrow_time = utc_time + timedelta(hours=24)
-        tomorrow = (tomorrow_time.year, tomorrow_time.month, tomorrow_time.day)
-
-        for url, day in zip(self.get_url(), self.days):
+        Fetch tomorrow's prices in the zones still missing once they are
+        published. Blocking, meant for the worker thread, while
+        utils.check_tomorrow does the same from the event loop.
 
-            print(f"Fetching JSON from: {url}")
-            try:
-                response = urequests.get(url)
-            except OSError as e:
-                GUI.set_error(e)
-                print(
-                    f"Failed to obtain an HTTPS connection (OSError: {e}), retrying in 5 seconds..."
-                )
-                pytime.sleep(5)
-                machine.soft_reset()
+        Args:
+            clock (Clock): Local time snapshot, ticked by the caller.
+            fetched (dict): Date of the last series fetched per zone, updated
+                in place so each day is fetched once.
 
-            if response.status_code == 200:
-                data = response.json()
-
-                # Extract prices and time_end data
-                prices = [item["SEK_per_kWh"] for item in data]
-                time_ends = [item["time_end"] for item in data]
-
-                print(prices)
-
-                # Determine if this is today or tomorrow and write to appropriate file
-                day_tuple = (day.year, day.month, day.day)
-                if day_tuple == today:
-                    # Write today's prices
-                    with open("prices_today.json", "w") as f:
-                        ujson.dump(prices, f)
-                    # Write DST offset for today
-                    dst_offset = self._get_dst_offset_from_times(time_ends)
-                    with open("dst_offset.json", "w") as f:
-                        ujson.dump(dst_offset, f)
-                elif day_tuple == tomorrow:
-                    # Write tomorrow's prices
-                    with open("prices_tomorrow.json", "w") as f:
-                        ujson.dump(prices, f)
-
-                # Clear variables to free memory
-                del data, prices, time_ends
-
-            else:
-                print(
-                    f"Failed to fetch JSON for day {day.day}, status code: {response.status_code}. Prices might not be available yet."
-                )
-                failure_count += 1
-                if failure_count == 2:
-                    print("Failed to fetch JSON twice, rebooting...")
-                    machine.soft_reset()
-            response.close()
-            gc.collect()
+        Returns:
+            list: The PriceSeries fetched by this call.
+        """
+        day = clock.date(1)
+        have = [zone for zone in fetched if fetched[zone] == day]
+        missing = self.missing_tomorrow(clock, have)
+        if not missing:
+            return []
 
-        print("Response received!")
+        out = []
+        try:
+            if self.probe(day):
+                for zone in missing:
+                    series = self.fetch(day, clock.date(-1), zone)
+                    if series is None:
+                        break
+                    fetched[zone] = day
+                    out.append(series)
+        except OSError as e:
+            print(f"Connection failed: {e}")
+        self.polled_tomorrow(len(out) == len(missing))
+
+        return out
+
+    @staticmethod
+    def add_series(series, clock, prices_today, prices_tomorrow):
+        # type: (PriceSeries, Clock, dict, dict) -> dict
+        """
+        Add a series fetched in the background to the prices of its day.
+        Tomorrow's prices fetched just before midnight can arrive after it,
+        when their day is today, so they are added to today's.
 
-        return self._from_file()
+        Args:
+            series (PriceSeries): The fetched prices.
+            clock (Clock): Local time snapshot.
+            prices_today (dict): Today's PriceSeries by zone.
+            prices_tomorrow (dict): Tomorrow's PriceSeries by zone.
 
-    def _get_dst_offset_from_times(self, time_ends):
-        # type: (list) -> int
+        Returns:
+            dict: prices_today or prices_tomorrow, whichever the series was
+                added to, None if it is for another day.
         """
-        Get the Daylight Saving Time (DST) offset from time_end list.
+        for day, prices in (
+            (clock.date(1), prices_tomorrow),
+            (clock.date(), prices_today),
+        ):
+            if series.date == day:
+                prices[series.zone] = series
+                return prices
+
+        return None
+
+    def _fetched(self, day, zone, status, oldest):
+        # type: (tuple, str, int, tuple) -> PriceSeries
+        """
+        Turn the parsed prices into a series and store it in the cache.
+
         Args:
-            time_ends (list): List of time_end strings.
+            day (tuple): (year, month, day)
+            zone (str): Bidding zone.
+            status (int): HTTP status code of the fetch.
+            oldest (tuple): Cached days before this date are dropped.
+
         Returns:
-            int: The DST offset in hours.
+            PriceSeries: The prices, or None if they are not published yet or
+                the body did not hold a whole day of 92 to 100 slots.
+        """
+        gc.collect()
+        if status != 200:
+            print(
+                f"Failed to fetch JSON for {zone} day {day[2]}, status code: {status}. Prices might not be available yet."
+            )
+            return None
+        count = self._parser.count
+        if not _MIN_SLOTS <= count <= _MAX_SLOTS:  # Empty or cut short
+            print(f"Rejected {count} prices for {zone} {day}, expected 92-100")
+            return None
+
+        series = PriceSeries.from_buffer(day, zone, self._prices, count)
+        print(f"Received {count} prices for {zone} {day}")
+        self.cache.store(series, oldest)
+
+        return self._prepare(series)
+
+    def _prepare(self, series):
+        # type: (PriceSeries) -> PriceSeries
         """
-        last_time_end = time_ends[-1]
-        tz_part = last_time_end.partition("+0")[2]
-        dst_offset = int(tz_part[0]) if tz_part and tz_part[0].isdigit() else None
+        Derive what the display needs from a loaded series, once per day
+        rather than per tick: total cost when a tariff is configured, and
+        the daily statistics. The cache keeps the spot prices, so a changed
+        tariff applies to cached days as well.
 
-        return dst_offset
+        Args:
+            series (PriceSeries): Spot prices as fetched or cached.
 
-    def _from_file(self):
-        # type: () -> tuple
+        Returns:
+            PriceSeries: Total cost if a tariff is configured, otherwise the
+                spot prices.
         """
-        Read electricity prices and DST offset from JSON files and delete them after reading.
+        if self.tariff is not None:
+            series = self.tariff.apply(series)
+        day_stats(series, self.percentiles)
 
-        This method reads the previously saved data from the filesystem:
-        - prices_today.json: Today's electricity prices (list of floats)
-        - prices_tomorrow.json: Tomorrow's electricity prices (list of floats)
-        - dst_offset.json: Current DST offset in hours (int)
+        return series
 
-        After successfully reading each file, it is deleted to free up storage space.
+    def get_prices(self):
+        # type: () -> tuple
+        """
+        Get prices for today and tomorrow in every zone, and for yesterday
+        when the graph is continuous, from the flash cache when a day was
+        already downloaded, otherwise from the API over one connection.
 
         Returns:
-            tuple: (prices_today, prices_tomorrow, dst_offset)
-                - prices_today (list or None): List of today's prices or None if file missing
-                - prices_tomorrow (list or None): List of tomorrow's prices or None if file missing
-                - dst_offset (int): DST offset in hours, defaults to 1 (CET) if file missing
+            tuple: (prices_today, prices_tomorrow, prices_yesterday)
+                - prices_today (dict): Today's PriceSeries by zone, a zone is missing if unavailable
+                - prices_tomorrow (dict): Tomorrow's PriceSeries by zone, a zone is missing if not published yet
+                - prices_yesterday (dict): Yesterday's PriceSeries by zone, empty unless the graph is continuous
         """
-        # Read prices and DST offset from files
-        try:
-            with open("prices_today.json", "r") as f:
-                prices_today = ujson.load(f)
-            os.remove("prices_today.json")
-        except (OSError, ValueError):
-            prices_today = None
+        prices_today = {}
+        prices_tomorrow = {}
+        prices_yesterday = {}
+        days = self.days
+        targets = (prices_today, prices_tomorrow)
+        if self.continuous:
+            days = (self.yesterday,) + days
+            targets = (prices_yesterday,) + targets
+
+        for zone in self.zones:
+            for day, prices in zip(days, targets):
+
+                cached = self.cache.load(zone, day)
+                if cached is not None and _MIN_SLOTS <= len(cached) <= _MAX_SLOTS:
+                    print(f"Using cached prices for {zone} {day}")
+                    prices[zone] = self._prepare(cached)
+                    continue
+
+                try:
+                    fetched = self.fetch(day, self.yesterday, zone)
+                except OSError as e:
+                    from app.ili9341 import GUI  # Not imported off the device
+
+                    GUI.set_error(e)
+                    print(
+                        f"Failed to obtain an HTTPS connection (OSError: {e}), retrying in 5 seconds..."
+                    )
+                    pytime.sleep(5)
+                    machine.soft_reset()
 
-        try:
-            with open("prices_tomorrow.json", "r") as f:
-                prices_tomorrow = ujson.load(f)
-            os.remove("prices_tomorrow.json")
-        except (OSError, ValueError):
-            prices_tomorrow = None
+                if fetched is not None:
+                    prices[zone] = fetched
 
-        try:
-            with open("dst_offset.json", "r") as f:
-                dst_offset = ujson.load(f)
-            os.remove("dst_offset.json")
-        except (OSError, ValueError):
-            dst_offset = 1  # Fallback to CET
-            print("Could not read dst_offset.json, using CET fallback (UTC+1)")
-
-        return prices_today, prices_tomorrow, dst_offset
+            if zone not in prices_today and zone not in prices_tomorrow:
+                print("Failed to fetch JSON twice, rebooting...")
+                machine.soft_reset()
+
+        print(
+            f"Response received! {self.http.requests} requests over {self.http.connects} connections"
+        )
+        self.http.close()  # Later requests go through the event loop
+
+        return prices_today, prices_tomorrow, prices_yesterday
 
     # Debug TLS connection and save to file
 
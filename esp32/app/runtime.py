@@ -0,0 +1,261 @@
+"""
+Run the display as a set of asyncio tasks.
+
+This module includes a class to:
+- Tick the clock and render the display on wall-clock second boundaries
+- Rotate the display between the configured bidding zones
+- Show when to start the configured loads
+- Fetch tomorrow's prices once they are published
+- Resynchronize the RTC with NTP and correct its drift
+- Supervise the WiFi connection
+- Or take tomorrow's prices from a worker thread that does the networking
+"""
+
+import asyncio
+import machine
+from app import utils
+from app.scheduler import Ticker
+from app.ili9341 import GUI
+from app.optimizer import LoadPlanner
+from gui.core.colors import RED, YELLOW
+from gui.core.nanogui import refresh
+
+
+class Runtime:
+    """
+    Event loop for the running display.
+
+    Every concern is a separate task, so a slow price fetch or NTP query
+    never holds up the clock. Frames are copied to the display with the
+    driver's async do_refresh, which yields between segments.
+    """
+
+    def __init__(
+        self,
+        gui,
+        api,
+        ntp,
+        clock,
+        prices_today,
+        prices_tomorrow,
+        prices_yesterday,
+        worker=None,
+    ):
+        # type: (GUI, ElectricityPriceAPI, SweTime, Clock, dict, dict, dict, PriceWorker) -> None
+        """
+        Initialize the runtime with the objects set up at boot.
+
+        Args:
+            gui (GUI): The GUI instance with prices already plotted.
+            api (ElectricityPriceAPI): The API instance to fetch prices.
+            ntp (SweTime): The synchronized NTP service.
+            clock (Clock): Local time snapshot.
+            prices_today (dict): The prices for today, PriceSeries by zone.
+            prices_tomorrow (dict): The prices for tomorrow, PriceSeries by zone.
+            prices_yesterday (dict): The prices for yesterday, PriceSeries by
+                zone, empty unless the graph is continuous.
+            worker (PriceWorker): Worker thread that replaces the price and
+                WiFi tasks, None to run them in the event loop.
+        """
+        self.gui = gui
+        self.api = api
+        self.ntp = ntp
+        self.clock = clock
+        self.prices_today = prices_today
+        self.prices_tomorrow = prices_tomorrow
+        # Only the continuous graph shows yesterday, other modes let it go
+        self.prices_yesterday = prices_yesterday if api.continuous else None
+        self.worker = worker
+        # One planner per zone, so rotating zones does not rebuild the tables
+        self.planners = {}
+        if api.config.get("loads"):
+            self.planners = {
+                zone: LoadPlanner.from_config(api.config) for zone in api.zones
+            }
+        self.ticker = None
+
+    async def run(self):
+        # type: () -> None
+        """
+        Start the tasks and run until one of them fails.
+        """
+        asyncio.get_event_loop().set_exception_handler(self._failed)
+        self.gui.deferred = True
+        self.ticker = Ticker()
+
+        if self.worker is not None:
+            self.worker.start()
+            asyncio.create_task(self._mailbox())
+        else:
+            asyncio.create_task(self._prices())
+            asyncio.create_task(utils.supervise_wifi())
+        asyncio.create_task(self._ntp())
+        await self._render()
+
+    @staticmethod
+    def _failed(loop, context):
+        # type: (object, dict) -> None
+        """
+        Show an unhandled task error and restart, as the display would
+        otherwise freeze.
+        """
+        e = context["exception"]
+        print(f"Task failed: {e}")
+        GUI.set_error(e)
+        machine.soft_reset()
+
+    async def _render(self):
+        # type: () -> None
+        """
+        Move the clock hands every second, update prices every 15 minutes and
+        switch to the next zone every zone_rotate seconds.
+        """
+        gui = self.gui
+        clock = self.clock
+        ticker = self.ticker
+        zones = self.api.zones
+        rotate = self.api.config.get("zone_rotate", 10) if len(zones) > 1 else 0
+        days, months, dial, hrs, mins, secs = gui.set_clock()
+        current_15min = clock.slot
+        planned = None  # Zone and slot the load recommendations were shown for
+        date = None
+
+        while True:
+            clock.tick()
+            hrs.position(clock.hour % 12 * 60 + clock.minute, YELLOW)
+            mins.position(clock.minute, YELLOW)
+            secs.position(clock.second, RED)
+            if date != clock.day:
+                date = clock.day
+                dial.text(
+                    "{} {} {}".format(
+                        days[clock.weekday], clock.day, months[clock.month - 1]
+                    )
+                )
+                refresh(gui.ssd, show=False)
+                gui.dirty = True
+            else:
+                refresh(gui.ssd, partial=True)  # Flush only what the hands touched
+
+            current_15min, self.prices_today, self.prices_tomorrow = (
+                utils.update_display(
+                    gui,
+                    self.prices_today,
+                    self.prices_tomorrow,
+                    current_15min,
+                    clock,
+                    self.prices_yesterday,
+                )
+            )
+            if rotate and clock.epoch % rotate == 0:
+                zone = zones[(zones.index(gui.zone) + 1) % len(zones)]
+                gui.show_zone(
+                    zone,
+                    self.prices_today,
+                    self.prices_tomorrow,
+                    current_15min,
+                    self.prices_yesterday,
+                )
+            if self.planners:
+                planned = self._plan(current_15min, planned)
+            await gui.flush()
+
+            if clock.minute == 0 and clock.second == 0:
+                print(f"Tick statistics: {ticker.stats()}")
+
+            await ticker.wait()
+
+    def _plan(self, current_15min, planned):
+        # type: (int, tuple) -> tuple
+        """
+        Show the load recommendations when the slot, the zone on display or
+        its prices changed. The planner of the zone rebuilds its tables only
+        when the prices of the zone changed.
+
+        Args:
+            current_15min (int): 15-minute interval now.
+            planned (tuple): (zone, 15-minute interval) of the last
+                recommendations.
+
+        Returns:
+            tuple: (zone, 15-minute interval) of the recommendations shown.
+        """
+        zone = self.gui.zone
+        planner = self.planners[zone]
+        today = self.prices_today.get(zone)
+        changed = planner.update(today, self.prices_tomorrow.get(zone))
+        shown = (zone, current_15min)
+        if today is not None and (changed or shown != planned):
+            self.gui.set_loads(planner.recommendations(current_15min), today)
+
+        return shown
+
+    async def _prices(self, interval=1):
+        # type: (int) -> None
+        """
+        Check for tomorrow's prices. The API's backoff decides how often a
+        check actually goes out on the network.
+
+        Args:
+            interval (int): Seconds between checks.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await utils.check_tomorrow(
+                self.gui, self.api, self.clock, self.prices_tomorrow
+            )
+
+    async def _mailbox(self, interval=1):
+        # type: (int) -> None
+        """
+        Plot the prices the worker thread posts. Only the finished series
+        crosses between the threads.
+
+        Args:
+            interval (int): Seconds between mailbox checks.
+
+        Raises:
+            Exception: The error that stopped the worker.
+        """
+        worker = self.worker
+        while True:
+            await asyncio.sleep(interval)
+            if worker.error is not None:
+                raise worker.error
+            series = worker.mailbox.take()
+            if series is None:
+                continue
+            clock = self.clock
+            prices = self.api.add_series(
+                series, clock, self.prices_today, self.prices_tomorrow
+            )
+            if prices is None:
+                continue
+            print(
+                f"New {series.zone} prices available @ {clock.hour}:{clock.minute}:{clock.second}, updating display..."
+            )
+            if series.zone != self.gui.zone:
+                continue
+            if prices is self.prices_tomorrow:
+                self.gui.plot_tomorrow(series)
+            else:  # Posted before midnight, taken after it
+                self.gui.show_zone(
+                    series.zone,
+                    self.prices_today,
+                    self.prices_tomorrow,
+                    clock.slot,
+                    self.prices_yesterday,
+                )
+
+    async def _ntp(self, interval=1):
+        # type: (int) -> None
+        """
+        Resynchronize the RTC when due and correct its drift in between.
+
+        Args:
+            interval (int): Seconds between polls.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            if await self.ntp.poll():
+                self.ticker.align()  # RTC was stepped
@@ -0,0 +1,90 @@
+"""
+A module to schedule periodic work on wall-clock second boundaries.
+
+This module includes a class to:
+- Align a tick deadline with the RTC second
+- Sleep until the next deadline while other asyncio tasks run
+- Count missed ticks and keep lateness statistics
+"""
+
+import asyncio
+import time
+
+
+class Ticker:
+    """
+    Fire on exact period boundaries using time.ticks_ms deadlines.
+
+    Deadlines advance by a fixed period rather than by sleeping a fixed time
+    after the work is done, so render time does not accumulate as drift.
+    """
+
+    def __init__(self, period=1000):
+        # type: (int) -> None
+        """
+        Initialize the ticker and align the first deadline.
+
+        Args:
+            period (int): Tick period in milliseconds.
+        """
+        self.period = period
+        self.ticks = 0
+        self.missed = 0
+        self.late_max = 0
+        self.late_total = 0
+        self.align()
+
+    def align(self):
+        # type: () -> None
+        """
+        Set the next deadline to the start of the next RTC second. Call again
+        after the RTC has been stepped.
+        """
+        if hasattr(time, "time_ns"):
+            phase = (time.time_ns() // 1_000_000) % 1000
+        else:  # Wait for the second to roll over
+            now = time.time()
+            while time.time() == now:
+                time.sleep_ms(1)
+            phase = 0
+        self.deadline = time.ticks_add(time.ticks_ms(), self.period - phase)
+
+    async def wait(self):
+        # type: () -> int
+        """
+        Sleep until the next deadline, letting other asyncio tasks run.
+
+        Returns:
+            int: Number of periods since the previous tick, 1 unless ticks
+                were missed.
+        """
+        remaining = time.ticks_diff(self.deadline, time.ticks_ms())
+        if remaining > 0:
+            await asyncio.sleep_ms(remaining)
+        late = max(time.ticks_diff(time.ticks_ms(), self.deadline), 0)
+        skipped = late // self.period
+        late -= skipped * self.period
+
+        self.ticks += 1
+        self.missed += skipped
+        self.late_total += late
+        if late > self.late_max:
+            self.late_max = late
+        self.deadline = time.ticks_add(self.deadline, (skipped + 1) * self.period)
+
+        return skipped + 1
+
+    def stats(self):
+        # type: () -> dict
+        """
+        Get lateness statistics.
+
+        Returns:
+            dict: ticks, missed ticks, maximum and mean lateness in ms.
+        """
+        return {
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "late_max": self.late_max,
+            "late_mean": self.late_total // self.ticks if self.ticks else 0,
+        }
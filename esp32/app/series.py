@@ -0,0 +1,106 @@
+"""
+A compact container for one day of spot prices.
+
+This module includes a class to:
+- Hold prices as fixed-point öre in an array('h'), two bytes per slot
+- Carry the date, bidding zone and slot duration with the prices
+- Get the UTC epoch and local time of a slot by arithmetic, right on the
+  92- and 100-slot days of the DST transitions
+- Cache the summary statistics and render plan of the day with the prices
+- Resample to a coarser resolution, keeping the mean, min and max
+"""
+
+from app import analytics
+from app.swe_time import midnight, local_time
+
+
+class PriceSeries:
+    """
+    Spot prices for one bidding zone and calendar day.
+    """
+
+    def __init__(self, date, zone, values, slot=15):
+        # type: (tuple, str, array, int) -> None
+        """
+        Initialize the series.
+
+        Args:
+            date (tuple): Local date (year, month, day) the prices apply to.
+            zone (str): Bidding zone, e.g. "SE3".
+            values (array): Prices in öre, one per slot, typecode "h".
+            slot (int): Slot duration in minutes.
+        """
+        self.date = date
+        self.zone = zone
+        self.values = values
+        self.slot = slot
+        self.start = midnight(date)  # UTC epoch of the first slot
+        self.stats = None  # DayStats, computed once by app.stats.day_stats
+        self.plan = None  # RenderPlan, built once by app.plan.RenderPlan.of
+        self._resampled = {}  # (means, mins, maxs) by slots per group
+
+    @classmethod
+    def from_buffer(cls, date, zone, buf, count, slot=15):
+        # type: (tuple, str, array, int, int) -> PriceSeries
+        """
+        Copy the first count values of a parse buffer into a new series.
+
+        Returns:
+            PriceSeries: A series sized to exactly count slots.
+        """
+        return cls(date, zone, buf[:count], slot)
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.values)
+
+    def __getitem__(self, i):
+        # type: (int) -> int
+        """
+        Get the price of a slot in öre.
+        """
+        return self.values[i]
+
+    def epoch(self, i):
+        # type: (int) -> int
+        """
+        Get the UTC epoch a slot starts at, also for slots past the day.
+        """
+        return self.start + i * self.slot * 60
+
+    def time(self, i):
+        # type: (int) -> tuple
+        """
+        Get the local time a slot starts at.
+
+        Returns:
+            tuple: (hour, minute)
+        """
+        local = local_time(self.epoch(i))
+
+        return local[3], local[4]
+
+    def resample(self, size):
+        # type: (int) -> tuple
+        """
+        Get the series at a coarser resolution, e.g. 4 for hourly from
+        15-minute slots, in one pass over the slots. Results are cached per
+        size.
+
+        Args:
+            size (int): Slots per group. A last group with fewer slots is
+                left out, so sizes that divide 92, 96 and 100 keep the day.
+
+        Returns:
+            tuple: (means, mins, maxs) as PriceSeries of size * slot
+                minutes, the series itself three times if size is 1.
+        """
+        if size <= 1:
+            return self, self, self
+        if size not in self._resampled:
+            self._resampled[size] = tuple(
+                PriceSeries(self.date, self.zone, values, self.slot * size)
+                for values in analytics.groups(self.values, size)
+            )
+
+        return self._resampled[size]
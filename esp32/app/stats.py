@@ -0,0 +1,75 @@
+"""
+Summary statistics of one day of prices.
+
+This module includes a class and a function to:
+- Compute min, max, mean and the slots of the extremes in one pass
+- Compute the median and percentiles from one sorted copy
+- Cache the result on the series so it is computed once per day
+"""
+
+from app import analytics
+
+
+class DayStats:
+    """
+    Statistics of a PriceSeries, all prices in integer öre.
+    """
+
+    def __init__(self, values, percentiles=()):
+        # type: (array, tuple) -> None
+        """
+        Compute the statistics.
+
+        Args:
+            values (array): Prices in öre, at least one.
+            percentiles (tuple): Percentiles to compute, 0 to 100.
+        """
+        n = len(values)
+        low, argmin, high, argmax, total = analytics.extremes(values)
+
+        self.count = n
+        self.min = low
+        self.max = high
+        self.argmin = argmin  # First slot with the lowest price
+        self.argmax = argmax  # First slot with the highest price
+        self.mean = (2 * total + n) // (2 * n)  # Rounded half up
+
+        ordered = analytics.sort(values)
+        self.median = self._percentile(ordered, 50)
+        self.percentiles = {p: self._percentile(ordered, p) for p in percentiles}
+
+    @staticmethod
+    def _percentile(ordered, p):
+        # type: (list, int) -> int
+        """
+        Get a percentile by linear interpolation between the closest ranks,
+        rounded to whole öre.
+        """
+        pos = p * (len(ordered) - 1)
+        i, frac = divmod(pos, 100)
+        if not frac:
+            return ordered[i]
+
+        return ordered[i] + ((ordered[i + 1] - ordered[i]) * frac + 50) // 100
+
+
+def day_stats(series, percentiles=()):
+    # type: (PriceSeries, tuple) -> DayStats
+    """
+    Get the statistics of a series, computing them on first use or when a
+    percentile not computed before is asked for.
+
+    Args:
+        series (PriceSeries): The prices of one day.
+        percentiles (tuple): Percentiles to compute, 0 to 100.
+
+    Returns:
+        DayStats: The statistics cached on the series.
+    """
+    stats = series.stats
+    if stats is None or any(p not in stats.percentiles for p in percentiles):
+        if stats is not None:
+            percentiles = tuple(stats.percentiles) + tuple(percentiles)
+        series.stats = DayStats(series.values, percentiles)
+
+    return series.stats
@@ -0,0 +1,162 @@
+"""
+A streaming parser for the price API response.
+
+This module includes a class to:
+- Consume the response body in fixed-size chunks as it arrives
+- Extract only the SEK_per_kWh values, skipping everything else
+- Store them as fixed-point integers in a preallocated array
+"""
+
+_KEY = b'"SEK_per_kWh"'
+_KEYLEN = len(_KEY)
+
+# Parser states
+_SEARCH = 0  # Looking for the key
+_COLON = 1  # Key found, expecting ':'
+_VALUE = 2  # Expecting the start of a number
+_NUMBER = 3  # Inside a number
+_DONE = 4  # Output array is full
+
+_MAX_DIGITS = 9  # Significant digits kept, fits a small int
+
+
+class PriceParser:
+    """
+    Incremental parser for the JSON array returned by the price API.
+
+    The parser is fed raw bytes in chunks of any size, a number split across
+    two chunks is handled. Values are converted from their decimal text to
+    integers with `decimals` fixed decimals without creating float objects.
+    """
+
+    def __init__(self, out, decimals=2):
+        # type: (array, int) -> None
+        """
+        Initialize the parser.
+
+        Args:
+            out (array): Preallocated array receiving the values.
+            decimals (int): Decimals kept in the fixed-point values, 2 gives öre.
+        """
+        self.decimals = decimals
+        self.reset(out)
+
+    def reset(self, out=None):
+        # type: (array) -> None
+        """
+        Prepare the parser for a new response.
+
+        Args:
+            out (array): New output array, defaults to the current one.
+        """
+        if out is not None:
+            self.out = out
+        self.count = 0
+        self._state = _SEARCH
+        self._match = 0
+
+    def feed(self, buf, i, n):
+        # type: (bytearray, int, int) -> int
+        """
+        Parse the next chunk of the response body.
+
+        Args:
+            buf (bytearray): Buffer holding the chunk.
+            i (int): Index of the first byte of the chunk in buf.
+            n (int): Index after the last byte of the chunk in buf.
+
+        Returns:
+            int: Number of values parsed so far.
+        """
+        while i < n:
+            state = self._state
+            if state == _SEARCH:
+                c = buf[i]
+                if c == _KEY[self._match]:
+                    self._match += 1
+                    if self._match == _KEYLEN:
+                        self._match = 0
+                        self._state = _COLON
+                else:
+                    self._match = 1 if c == _KEY[0] else 0
+            elif state == _COLON:
+                if buf[i] == 0x3A:  # ':'
+                    self._state = _VALUE
+            elif state == _VALUE:
+                c = buf[i]
+                if c == 0x2D or 0x30 <= c <= 0x39:  # '-' or digit
+                    self._start_number()
+                    self._state = _NUMBER
+                    continue
+            elif state == _NUMBER:
+                if not self._number_char(buf[i]):
+                    self._store()
+                    continue
+            else:  # _DONE
+                break
+            i += 1
+
+        return self.count
+
+    def _start_number(self):
+        # type: () -> None
+        """
+        Reset the number accumulator.
+        """
+        self._neg = False
+        self._mant = 0
+        self._digits = 0  # Significant digits in the mantissa
+        self._scale = 0  # Power of ten applied to the mantissa
+        self._frac = False
+        self._exp = None  # Exponent digits, None outside the exponent
+        self._exp_neg = False
+
+    def _number_char(self, c):
+        # type: (int) -> bool
+        """
+        Accumulate one character of a number.
+
+        Returns:
+            bool: False if c terminates the number.
+        """
+        if 0x30 <= c <= 0x39:
+            if self._exp is not None:
+                self._exp = self._exp * 10 + c - 0x30
+            elif self._digits < _MAX_DIGITS:
+                if self._mant or c != 0x30:
+                    self._digits += 1
+                self._mant = self._mant * 10 + c - 0x30
+                if self._frac:
+                    self._scale -= 1
+            elif not self._frac:  # Dropped integer digit
+                self._scale += 1
+        elif c == 0x2E:  # '.'
+            self._frac = True
+        elif c == 0x65 or c == 0x45:  # 'e' or 'E'
+            self._exp = 0
+        elif c == 0x2D:  # '-'
+            if self._exp is None:
+                self._neg = True
+            else:
+                self._exp_neg = True
+        elif c != 0x2B:  # '+'
+            return False
+        return True
+
+    def _store(self):
+        # type: () -> None
+        """
+        Convert the accumulated number to fixed point, rounding half away from
+        zero, and append it to the output array.
+        """
+        p = self._scale + self.decimals
+        if self._exp:
+            p += -self._exp if self._exp_neg else self._exp
+        if p >= 0:
+            value = self._mant * 10**p
+        else:
+            d = 10 ** min(-p, _MAX_DIGITS + 1)
+            value = (self._mant + d // 2) // d
+        self.out[self.count] = -value if self._neg else value
+        self.count += 1
+        self._state = _DONE if self.count == len(self.out) else _SEARCH
@@ -1,60 +1,312 @@
 """
 A module to handle Swedish local time with consideration for daylight saving time.
 
-This module includes a class to:
-- Initialize the Swedish timezone with DST consideration
-- Get the current local time in Sweden
+This module includes a class and functions to:
+- Synchronize the RTC with an NTP server and correct its drift between syncs
+- Resynchronize from an asyncio task without blocking the event loop
+- Compute the EU daylight saving time transitions for any year
+- Get the offset of Swedish local time from the integer UTC epoch
+- Convert between UTC epochs and Swedish local dates and times
 """
 
-import ntptime
+import asyncio
+import errno
 import machine
+import socket
+import struct
 import time
-from datetime import datetime, timezone, timedelta
+import ujson
+
+_transitions = None  # (year, DST start, DST end) as UTC epochs, cached per year
+
+
+def _last_sunday(year, month):
+    # type: (int, int) -> int
+    """
+    Get 01:00 UTC on the last Sunday of a 31-day month.
+
+    Args:
+        year (int): Year.
+        month (int): Month, March or October for the EU transitions.
+
+    Returns:
+        int: UTC epoch of the transition.
+    """
+    t = time.mktime((year, month, 31, 1, 0, 0, 0, 0))
+
+    return t - (time.gmtime(t)[6] + 1) % 7 * 86400  # Monday is 0
+
+
+def dst_offset(epoch):
+    # type: (int) -> int
+    """
+    Get the offset from UTC in Sweden. EU rules: summer time starts 01:00 UTC on
+    the last Sunday of March and ends 01:00 UTC on the last Sunday of October.
+
+    Args:
+        epoch (int): UTC epoch.
+
+    Returns:
+        int: 2 when DST is in effect, otherwise 1 (CET).
+    """
+    global _transitions
+    year = time.gmtime(epoch)[0]
+    if _transitions is None or _transitions[0] != year:
+        _transitions = (year, _last_sunday(year, 3), _last_sunday(year, 10))
+
+    return 2 if _transitions[1] <= epoch < _transitions[2] else 1
+
+
+def midnight(date):
+    # type: (tuple) -> int
+    """
+    Get the start of a Swedish calendar day. The DST transitions are at
+    01:00 UTC, so the offset at 00:00 UTC is the offset at local midnight.
+
+    Args:
+        date (tuple): Local date (year, month, day).
+
+    Returns:
+        int: UTC epoch of local midnight.
+    """
+    t = time.mktime((date[0], date[1], date[2], 0, 0, 0, 0, 0))
+
+    return t - dst_offset(t) * 3600
+
+
+def local_time(epoch):
+    # type: (int) -> tuple
+    """
+    Get Swedish local time.
+
+    Args:
+        epoch (int): UTC epoch.
+
+    Returns:
+        tuple: As time.gmtime, in local time.
+    """
+    return time.gmtime(epoch + dst_offset(epoch) * 3600)
 
 
 class SweTime:
     """
-    A class to handle Swedish local time with consideration for daylight saving time.
+    A class to keep the RTC, which runs on UTC, synchronized with an NTP server.
+
+    The RTC is resynchronized on a schedule. Between syncs the measured drift
+    of the RTC is applied in small steps, and failed queries are retried with
+    exponential backoff instead of resetting the device.
     """
 
-    def __init__(self):
-        # type: () -> None
+    _PACKET = b"\x1b" + bytes(47)  # LI 0, version 3, client mode
+    _DRIFT_SPAN = 60_000  # Shortest ms between syncs to estimate drift over
+    _BOOT_BACKOFF = 5000  # Longest ms between retries before the first sync
+
+    def __init__(self, config=None):
+        # type: (dict) -> None
         """
-        Initialize the SweTime class and set the timezone.
+        Initialize the SweTime class and synchronize the RTC, retrying until
+        the first sync succeeds.
+
+        Args:
+            config (dict): Settings, read from config.json if None.
         """
+        if config is None:
+            try:
+                with open("config.json", "r") as f:
+                    config = ujson.load(f)
+            except (OSError, ValueError):
+                config = {}
 
-        ntptime.host = "ntp.netnod.se"
-        ntptime.timeout = 5
-        try:
-            print(f"Synchronizing time with {ntptime.host}...")
-            ntptime.settime()
-            print("UTC time synchronized successfully!")
-        except OSError as e:
-            print(f"Failed to sync time: {e}")
-            time.sleep(3)
-            machine.soft_reset()
+        self.host = config.get("ntp_host", "ntp.netnod.se")
+        self.port = config.get("ntp_port", 123)
+        self.interval = config.get("ntp_interval", 3600) * 1000
+        self.timeout = config.get("ntp_timeout", 5)
+        self.drift = None  # RTC drift in parts per million, positive when slow
+        self.failures = 0
+        self._synced = None  # RTC ms at the last sync
+        self._adjusted = None  # RTC ms at the last drift correction
+        self._corrected = 0  # ms of drift correction applied since the last sync
+        self._delta = 2208988800 if time.gmtime(0)[0] == 1970 else 3155673600
+
+        print(f"Synchronizing time with {self.host}...")
+        while not self.sync():
+            time.sleep_ms(max(time.ticks_diff(self._next, time.ticks_ms()), 0))
 
-        print(f"UTC time is: {datetime.now(timezone(timedelta()))}")
+        print(f"UTC time is: {time.gmtime()}")
 
     @staticmethod
-    def utc_time():
-        # type: () -> datetime
+    def _rtc_ms():
+        # type: () -> int
         """
-        Get the current UTC time.
+        Get the RTC time in milliseconds since the device epoch.
+        """
+        return time.time_ns() // 1_000_000
+
+    @staticmethod
+    def _set_rtc(ms):
+        # type: (int) -> None
+        """
+        Set the RTC to a time in milliseconds since the device epoch.
+        """
+        tm = time.gmtime(ms // 1000)
+        machine.RTC().datetime(
+            (tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], ms % 1000 * 1000)
+        )
+
+    def _query(self):
+        # type: () -> int
+        """
+        Query the NTP server, blocking until the reply or the timeout.
 
         Returns:
-            datetime: The current UTC time.
+            int: Offset in ms to add to the RTC to get UTC.
         """
-        return datetime.now(timezone(timedelta()))
+        addr = socket.getaddrinfo(self.host, self.port)[0][-1]
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.settimeout(self.timeout)
+            sent = time.ticks_ms()
+            s.sendto(self._PACKET, addr)
+            reply = s.recv(48)
+            rtt = time.ticks_diff(time.ticks_ms(), sent)
+            rtc = self._rtc_ms()
+        finally:
+            s.close()
 
-    @staticmethod
-    def swe_localtime(dst_offset):
-        # type: (int) -> datetime
+        return self._offset(reply, rtt, rtc)
+
+    async def _query_async(self):
+        # type: () -> int
         """
-        Get the current local time in Sweden.
+        Query the NTP server, yielding to other tasks while waiting for the
+        reply. Only the DNS lookup blocks.
 
         Returns:
-            datetime: The current local time in Sweden.
+            int: Offset in ms to add to the RTC to get UTC.
+        """
+        addr = socket.getaddrinfo(self.host, self.port)[0][-1]
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setblocking(False)
+            sent = time.ticks_ms()
+            s.sendto(self._PACKET, addr)
+            while True:
+                try:
+                    reply = s.recv(48)
+                    break
+                except OSError as e:
+                    if e.errno != errno.EAGAIN:
+                        raise
+                if time.ticks_diff(time.ticks_ms(), sent) > self.timeout * 1000:
+                    raise OSError(errno.ETIMEDOUT)
+                await asyncio.sleep_ms(20)
+            rtt = time.ticks_diff(time.ticks_ms(), sent)
+            rtc = self._rtc_ms()
+        finally:
+            s.close()
+
+        return self._offset(reply, rtt, rtc)
+
+    def _offset(self, reply, rtt, rtc):
+        # type: (bytes, int, int) -> int
+        """
+        Get the RTC offset from an NTP reply.
+
+        Args:
+            reply (bytes): The NTP reply.
+            rtt (int): Round trip time in ms.
+            rtc (int): RTC ms when the reply arrived.
+
+        Returns:
+            int: Offset in ms to add to the RTC to get UTC.
+
+        Raises:
+            OSError: If the reply is short or invalid.
+        """
+        if len(reply) < 48:
+            raise OSError("Short NTP reply")
+        seconds, fraction = struct.unpack_from("!II", reply, 40)  # Transmit
+        if seconds == 0:
+            raise OSError("Invalid NTP reply")
+        utc = (seconds - self._delta) * 1000 + (fraction * 1000 >> 32) + rtt // 2
+
+        return utc - rtc
+
+    def _failed(self, e):
+        # type: (OSError) -> None
+        """
+        Schedule a retry with exponential backoff after a failed query. Until
+        the first sync the retries stay short, as nothing renders without time.
         """
+        self.failures += 1
+        backoff = min(5000 << min(self.failures, 10), self.interval)
+        if self._synced is None:
+            backoff = min(backoff, self._BOOT_BACKOFF)
+        self._next = time.ticks_add(time.ticks_ms(), backoff)
+        print(f"Failed to sync time: {e}, retrying in {backoff // 1000} s")
+
+    def _apply(self, offset):
+        # type: (int) -> None
+        """
+        Step the RTC by offset ms and update the drift estimate.
+        """
+        rtc = self._rtc_ms()
+        if self._synced is not None and rtc - self._synced > self._DRIFT_SPAN:
+            # Drift over the interval includes the corrections already applied
+            ppm = (offset + self._corrected) * 1_000_000 // (rtc - self._synced)
+            self.drift = ppm if self.drift is None else (self.drift + ppm) // 2
+        self._set_rtc(rtc + offset)
+        self._synced = self._adjusted = rtc + offset
+        self._corrected = 0
+        self.failures = 0
+        self._next = time.ticks_add(time.ticks_ms(), self.interval)
+        print(f"UTC time synchronized, offset {offset} ms, drift {self.drift} ppm")
+
+    def sync(self):
+        # type: () -> bool
+        """
+        Step the RTC to NTP time and update the drift estimate.
+
+        Returns:
+            bool: True if the RTC was set, False if the query failed and a
+                retry has been scheduled.
+        """
+        try:
+            self._apply(self._query())
+        except OSError as e:
+            self._failed(e)
+            return False
+
+        return True
+
+    async def poll(self, step=50):
+        # type: (int) -> bool
+        """
+        Resynchronize when due, otherwise apply the estimated drift once it
+        amounts to step ms. Meant to be awaited periodically by an asyncio task.
+
+        Args:
+            step (int): Smallest drift correction in ms.
+
+        Returns:
+            bool: True if the RTC was stepped.
+        """
+        if time.ticks_diff(time.ticks_ms(), self._next) >= 0:
+            try:
+                self._apply(await self._query_async())
+            except OSError as e:
+                self._failed(e)
+                return False
+            return True
+
+        if not self.drift:
+            return False
+        rtc = self._rtc_ms()
+        correction = self.drift * (rtc - self._adjusted) // 1_000_000
+        if abs(correction) < step:
+            return False
+        self._set_rtc(rtc + correction)
+        self._adjusted = rtc + correction
+        self._corrected += correction
 
-        return datetime.now(timezone(timedelta(hours=dst_offset)))
+        return True
@@ -0,0 +1,144 @@
+"""
+Total electricity cost from spot prices and the tariff.
+
+This module includes a class to:
+- Hold the tariff from config.json: supplier markup, grid fee, time-of-use
+  grid fees, energy tax and VAT
+- Build the fee of every slot of a day once, as an integer table
+- Transform a spot price series into a second series of total cost
+"""
+
+from array import array
+from app.series import PriceSeries
+from app.swe_time import midnight, local_time
+from app.analytics import scale_offset
+
+
+def _hundredths(sek):
+    # type: (float) -> int
+    """
+    Convert SEK/kWh to hundredths of öre, so fees like 0.439 SEK stay exact.
+    """
+    return round(sek * 10000)
+
+
+class Tariff:
+    """
+    Charges on top of the spot price, in SEK/kWh excluding VAT.
+
+    Total cost per slot is (spot + markup + grid fee + time-of-use fee +
+    energy tax) * (1 + VAT), rounded to whole öre. All arithmetic is on
+    integers, once per series.
+    """
+
+    def __init__(self, markup=0, grid_fee=0, energy_tax=0, vat=25, time_of_use=()):
+        # type: (float, float, float, int, list) -> None
+        """
+        Initialize the tariff.
+
+        Args:
+            markup (float): Supplier markup.
+            grid_fee (float): Grid transfer fee.
+            energy_tax (float): Energy tax.
+            vat (int): VAT in percent, applied to the sum of the above.
+            time_of_use (list): Dicts with "from" and "to" hours, "fee" and
+                optionally "months" (list of 1-12) and "weekdays" (True for
+                Monday to Friday only), added to the grid fee when they apply.
+
+        Raises:
+            TypeError, KeyError, ValueError, AttributeError: If a setting is
+                missing or of the wrong type.
+        """
+        self.base = (
+            _hundredths(markup) + _hundredths(grid_fee) + _hundredths(energy_tax)
+        )
+        self.vat = int(vat)
+        self.time_of_use = []
+        for period in time_of_use:
+            months = period.get("months")
+            self.time_of_use.append(
+                (
+                    int(period["from"]),
+                    int(period["to"]),
+                    _hundredths(period["fee"]),
+                    None if months is None else tuple(int(m) for m in months),
+                    bool(period.get("weekdays", False)),
+                )
+            )
+
+    @classmethod
+    def from_config(cls, config):
+        # type: (dict) -> Tariff
+        """
+        Create the tariff from the "tariff" key of config.json. A malformed
+        entry is caught here at boot, not when the first prices arrive.
+
+        Returns:
+            Tariff: The tariff, or None if none is configured or it is invalid.
+        """
+        tariff = config.get("tariff")
+        if not tariff:
+            return None
+        try:
+            return cls(**tariff)
+        except (TypeError, KeyError, ValueError, AttributeError) as e:
+            print(f"Invalid tariff in config file: {type(e).__name__} {e}")
+            print("Showing spot prices")
+            return None
+
+    def fees(self, date, count, slot=15):
+        # type: (tuple, int, int) -> array
+        """
+        Get the fee of every slot of a day before VAT.
+
+        Args:
+            date (tuple): Local date (year, month, day).
+            count (int): Number of slots.
+            slot (int): Slot duration in minutes.
+
+        Returns:
+            array: Fee per slot in hundredths of öre.
+        """
+        month = date[1]
+        day_start = midnight(date)
+        weekday = local_time(day_start)[6]
+        fees = array("i", bytes(4 * count))
+        for i in range(count):
+            fees[i] = self.base
+        hours = bytearray(count)  # Local hour of each slot, also on DST days
+        if self.time_of_use:
+            for i in range(count):
+                hours[i] = local_time(day_start + i * slot * 60)[3]
+        for start, end, fee, months, weekdays in self.time_of_use:
+            if months is not None and month not in months:
+                continue
+            if weekdays and weekday > 4:
+                continue
+            for i in range(count):
+                if start <= hours[i] < end:
+                    fees[i] += fee
+
+        return fees
+
+    def apply(self, series):
+        # type: (PriceSeries) -> PriceSeries
+        """
+        Transform spot prices into total cost.
+
+        Args:
+            series (PriceSeries): Spot prices in öre.
+
+        Returns:
+            PriceSeries: Total cost in öre for the same day and zone.
+        """
+        n = len(series)
+        fees = self.fees(series.date, n, series.slot)
+        scale = 100 + self.vat
+        # ((spot * 100 + fee) * scale + 5000) // 10000 equals
+        # (spot * scale + fee * scale // 100 + 50) // 100, which keeps every
+        # intermediate value small enough for the ulab backend to be exact
+        for i in range(n):
+            fees[i] = fees[i] * scale // 100 + 50
+        total = scale_offset(series.values, scale, fees)
+
+        return PriceSeries(series.date, series.zone, total, series.slot)
@@ -0,0 +1,181 @@
+"""
+A continuous timeline of prices over several days, decimated to the graph.
+
+This module includes a class to:
+- Lay yesterday, today and tomorrow end to end on one time axis
+- Reduce the slots under each pixel column of the graph to a min/max span
+- Cache the columns and shift them as the window moves, so only the columns
+  that scroll into view are computed
+"""
+
+from array import array
+
+NO_PRICES = 255  # Day of a column without prices
+
+
+class Timeline:
+    """
+    Min/max spans per pixel column of a window over consecutive days.
+
+    Columns are laid out on a fixed grid that starts at midnight today, so a
+    column covers the same minutes whatever the window. Moving the window a
+    few columns shifts the cache and computes only the new columns.
+    """
+
+    def __init__(self, width, hours=48, before=12):
+        # type: (int, int, int) -> None
+        """
+        Initialize an empty timeline.
+
+        Args:
+            width (int): Pixel columns of the graph.
+            hours (int): Hours shown across the graph.
+            before (int): Hours shown before now, None to show today and
+                tomorrow from midnight.
+        """
+        self.width = width
+        self.minutes = hours * 60
+        self.before = None if before is None else before * 60
+        self.lows = array("h", bytes(2 * width))  # Lowest price per column
+        self.highs = array("h", bytes(2 * width))  # Highest price per column
+        self.days = bytearray(width)  # 0 yesterday, 1 today, 2 tomorrow
+        self.first = None  # Grid column of the first column, None if invalid
+        self.series = (None, None, None)  # Yesterday, today, tomorrow
+
+    def load(self, today, tomorrow, yesterday=None):
+        # type: (PriceSeries, PriceSeries, PriceSeries) -> None
+        """
+        Set the prices of today and tomorrow, and of yesterday when known.
+        When today is the previous tomorrow, the previous today is kept as
+        yesterday and the cached columns are kept if the grid moves by whole
+        columns.
+
+        Args:
+            today (PriceSeries): Todays prices, or None.
+            tomorrow (PriceSeries): Tomorrows prices, or None.
+            yesterday (PriceSeries): Yesterdays prices, None to keep the
+                yesterday already loaded.
+        """
+        before, previous, upcoming = self.series
+        if today is previous:
+            if yesterday is None:
+                yesterday = before
+            if tomorrow is not upcoming or yesterday is not before:
+                self.first = None
+            self.series = (yesterday, today, tomorrow)
+            return
+
+        if today is not None and today is upcoming and previous is not None:
+            shift = len(previous) * previous.slot * self.width  # Midnight
+            days = self.days
+            if (
+                self.first is not None
+                and shift % self.minutes == 0
+                and tomorrow is None
+                and 0 not in days
+            ):
+                self.first -= shift // self.minutes
+                for c in range(self.width):
+                    if days[c] != NO_PRICES:
+                        days[c] -= 1  # Today is now yesterday
+            else:
+                self.first = None
+            self.series = (previous, today, tomorrow)
+        else:
+            self.first = None
+            self.series = (yesterday, today, tomorrow)
+
+    def start(self, now):
+        # type: (int) -> int
+        """
+        Get the grid column at the left edge of the graph.
+
+        Args:
+            now (int): Minutes since midnight today.
+        """
+        if self.before is None:
+            return 0
+
+        return (now - self.before) * self.width // self.minutes
+
+    def column(self, now):
+        # type: (int) -> int
+        """
+        Get the pixel column of a time in the window.
+
+        Args:
+            now (int): Minutes since midnight today.
+        """
+        return now * self.width // self.minutes - self.start(now)
+
+    def update(self, now):
+        # type: (int) -> None
+        """
+        Move the window to now. Cached columns are shifted and only the
+        columns that were not in the previous window are computed.
+
+        Args:
+            now (int): Minutes since midnight today.
+        """
+        width = self.width
+        first = self.start(now)
+        shift = width if self.first is None else first - self.first
+        self.first = first
+        if shift >= width or -shift >= width:
+            for c in range(width):
+                self._decimate(c)
+        elif shift > 0:
+            keep = width - shift
+            self.lows[:keep] = self.lows[shift:]
+            self.highs[:keep] = self.highs[shift:]
+            self.days[:keep] = self.days[shift:]
+            for c in range(keep, width):
+                self._decimate(c)
+        elif shift < 0:
+            keep = width + shift
+            self.lows[-shift:] = self.lows[:keep]
+            self.highs[-shift:] = self.highs[:keep]
+            self.days[-shift:] = self.days[:keep]
+            for c in range(-shift):
+                self._decimate(c)
+
+    def _decimate(self, c):
+        # type: (int) -> None
+        """
+        Reduce the slots that overlap a pixel column to their min and max.
+        """
+        k = self.first + c
+        start = k * self.minutes // self.width
+        end = -(-(k + 1) * self.minutes // self.width)
+        low = high = None
+        day = NO_PRICES
+        yesterday, today, tomorrow = self.series
+        if today is None:
+            self.days[c] = day
+            return
+        offsets = (
+            0 if yesterday is None else -len(yesterday) * yesterday.slot,
+            0,
+            len(today) * today.slot,
+        )
+        for d, series in enumerate(self.series):
+            if series is None:
+                continue
+            slot = series.slot
+            offset = offsets[d]
+            for i in range(
+                max(0, (start - offset) // slot),
+                min(len(series), -(-(end - offset) // slot)),
+            ):
+                v = series[i]
+                if low is None:
+                    low = high = v
+                    day = d
+                elif v < low:
+                    low = v
+                elif v > high:
+                    high = v
+        self.days[c] = day
+        if day != NO_PRICES:
+            self.lows[c] = low
+            self.highs[c] = high
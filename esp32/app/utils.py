@@ -3,16 +3,15 @@ Utility functions for network operations, time synchronization, and fetching ele
 
 This module includes functions to:
 - Connect to WiFi
+- Supervise the WiFi connection and reconnect when it drops
 - Enable a hotspot
-- Synchronize time with an NTP server
-- Fetch electricity prices from a file
 - Update the display with current prices
+- Load tomorrow's prices into the running display once published
 """
 
+import asyncio
 import ujson
 import network
-import machine
-import urequests
 from app.ili9341 import GUI
 
 
@@ -43,6 +42,49 @@ def wifi():
     print(f"Connected! {wlan.ifconfig()}")
 
 
+def reconnect_wifi():
+    # type: () -> network.WLAN
+    """
+    Start reconnecting to the WiFi in the config file without waiting for
+    the connection.
+
+    Returns:
+        network.WLAN: The station interface, to poll isconnected() on.
+    """
+    with open("config.json", "r") as f:
+        config = ujson.load(f)
+    print(f"WiFi connection lost, reconnecting to {config['ssid']}...")
+    wlan = network.WLAN(network.STA_IF)
+    wlan.disconnect()
+    wlan.connect(config["ssid"], config["password"])
+
+    return wlan
+
+
+async def supervise_wifi(interval=10, timeout=20):
+    # type: (int, int) -> None
+    """
+    Check the WiFi connection periodically and reconnect when it drops.
+    Meant to run as an asyncio task.
+
+    Args:
+        interval (int): Seconds between connection checks.
+        timeout (int): Seconds to wait for a reconnect before trying again.
+    """
+    wlan = network.WLAN(network.STA_IF)
+    while True:
+        await asyncio.sleep(interval)
+        if wlan.isconnected():
+            continue
+
+        reconnect_wifi()
+        for _ in range(timeout * 10):
+            if wlan.isconnected():
+                print(f"Reconnected! {wlan.ifconfig()}")
+                break
+            await asyncio.sleep_ms(100)
+
+
 def hotspot():
     # type: () -> None
     """
@@ -58,50 +100,80 @@ def hotspot():
 
 
 def update_display(
-    gui, prices_today, prices_tomorrow, current_15min, api, swe_localtime
+    gui, prices_today, prices_tomorrow, current_15min, clock, prices_yesterday=None
 ):
-    # type: (GUI, dict, dict, int, ElectricityPriceAPI, datetime) -> int
+    # type: (GUI, dict, dict, int, Clock, dict) -> tuple
     """
     Update the display with the current prices.
 
     Args:
         gui (GUI): The GUI instance to update.
-        prices_today (dict): The prices for today.
-        prices_tomorrow (dict): The prices for tomorrow.
-        current_hour (int): The current hour.
-        api (ElectricityPriceAPI): The API instance to fetch prices.
-        swe_localtime (datetime): The current local time in Sweden.
+        prices_today (dict): The prices for today, PriceSeries by zone.
+        prices_tomorrow (dict): The prices for tomorrow, PriceSeries by zone.
+        current_15min (int): The current 15-minute interval.
+        clock (Clock): Local time snapshot for this tick.
+        prices_yesterday (dict): The prices for yesterday, PriceSeries by
+            zone. Replaced in place by today's at midnight.
 
     Returns:
-        int: The current hour.
+        tuple: (current 15-minute interval, prices today, prices tomorrow)
     """
 
-    hour = swe_localtime.hour
-    minute = swe_localtime.minute
-    second = swe_localtime.second
-    upcoming_15min = (hour * 4) + (minute // 15)
+    upcoming_15min = clock.slot
 
     if upcoming_15min != current_15min:
         if upcoming_15min == 0:
+            if prices_yesterday is not None:
+                prices_yesterday.clear()
+                prices_yesterday.update(prices_today)
             prices_today = prices_tomorrow
-            prices_tomorrow = None
-            gui.plot_prices(prices_today, prices_tomorrow)
+            prices_tomorrow = {}
+            gui.plot_prices(prices_today.get(gui.zone), None)
 
-        gui.set_price(upcoming_15min, prices_today)
-        gui.set_arrow(hour)
-
-    # Checking if new prices are available.
-    if hour >= 13 and prices_tomorrow is None:
-        try:
-            response = urequests.get(api.get_url_tomorrow(swe_localtime))
-            if response.status_code == 200:
-                print(
-                    f"New prices available, rebooting and fetching from: {api.get_url_tomorrow(swe_localtime)} @ {hour}:{minute}:{second}..."
-                )
-                machine.soft_reset()
-            response.close()
-        except OSError as e:
-            print(f"Connection failed: {e}\nRebooting...")
-            machine.soft_reset()
+        gui.set_price(upcoming_15min, prices_today.get(gui.zone))
+        gui.set_now(upcoming_15min)
 
     return upcoming_15min, prices_today, prices_tomorrow
+
+
+async def check_tomorrow(gui, api, clock, prices_tomorrow):
+    # type: (GUI, ElectricityPriceAPI, Clock, dict) -> None
+    """
+    Fetch tomorrow's prices once they are published and add them to the graph
+    without restarting. Meant to be awaited periodically by an asyncio task.
+
+    When api.missing_tomorrow says a poll is due, a HEAD probe checks if the
+    day is published. All zones are published together, so one probe covers
+    them and the zones still missing are fetched in turn over the same
+    connection.
+
+    Args:
+        gui (GUI): The GUI instance to update.
+        api (ElectricityPriceAPI): The API instance to fetch prices.
+        clock (Clock): Local time snapshot for this tick.
+        prices_tomorrow (dict): The prices for tomorrow, PriceSeries by zone.
+            Fetched zones are added in place.
+    """
+
+    missing = api.missing_tomorrow(clock, prices_tomorrow)
+    if not missing:
+        return
+
+    try:
+        if await api.probe_async(clock.date(1)):
+            for zone in missing:
+                series = await api.fetch_async(clock.date(1), clock.date(-1), zone)
+                if series is None:
+                    break
+                prices_tomorrow[zone] = series
+                if zone == gui.zone:
+                    gui.plot_tomorrow(series)
+    except OSError as e:
+        print(f"Connection failed: {e}")
+
+    complete = len(prices_tomorrow) == len(api.zones)
+    api.polled_tomorrow(complete)
+    if complete:
+        print(
+            f"New prices available @ {clock.hour}:{clock.minute}:{clock.second}, updating display..."
+        )
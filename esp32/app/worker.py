@@ -0,0 +1,164 @@
+"""
+A background thread for the networking, to run it on the second core.
+
+This module includes classes to:
+- Hand objects from one thread to another through a lock-protected mailbox
+- Supervise WiFi and fetch prices in a _thread worker
+"""
+
+import time
+
+try:
+    import _thread
+except ImportError:  # Firmware built without threads
+    _thread = None
+
+
+class Mailbox:
+    """
+    First in, first out queue between threads.
+
+    Only references change hands, so the lock is held for a list operation
+    and never across I/O.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        """
+        Initialize an empty mailbox.
+        """
+        self._lock = _thread.allocate_lock()
+        self._items = []
+
+    def put(self, item):
+        # type: (object) -> None
+        """
+        Post an item.
+        """
+        with self._lock:
+            self._items.append(item)
+
+    def take(self):
+        # type: () -> object
+        """
+        Take the oldest item without waiting.
+
+        Returns:
+            object: The item, or None if the mailbox is empty.
+        """
+        with self._lock:
+            return self._items.pop(0) if self._items else None
+
+
+class PriceWorker:
+    """
+    Networking on a second thread.
+
+    The worker owns WiFi supervision and the blocking HTTP client, so
+    fetching and JSON parsing never hold up rendering and SPI flushes in the
+    event loop. The networking is passed in as functions, so the worker has
+    no hardware dependencies and runs on the unix port as well.
+    """
+
+    def __init__(
+        self,
+        fetch,
+        post=None,
+        online=None,
+        reconnect=None,
+        interval=1000,
+        wifi_interval=10,
+    ):
+        # type: (function, function, function, function, int, int) -> None
+        """
+        Initialize the worker.
+
+        Args:
+            fetch (function): Called on the worker thread every interval
+                while online, returns a list of finished objects, e.g. the
+                PriceSeries fetched since the last call.
+            post (function): Called on the worker thread with each fetched
+                object, by default mailbox.put.
+            online (function): Returns False while WiFi is down, None if the
+                worker is always online.
+            reconnect (function): Called when online returns False at a WiFi
+                check.
+            interval (int): Milliseconds between calls of fetch.
+            wifi_interval (int): Seconds between WiFi connection checks.
+        """
+        self.mailbox = Mailbox()
+        self.fetch = fetch
+        self.post = post or self.mailbox.put
+        self.online = online
+        self.reconnect = reconnect
+        self.interval = interval
+        self.wifi_interval = wifi_interval * 1000
+        self.running = False
+        self.stopped = True  # The thread is not running
+        self.error = None  # Exception that stopped the worker
+
+    @staticmethod
+    def available():
+        # type: () -> bool
+        """
+        Check if the firmware supports threads.
+        """
+        return _thread is not None
+
+    def start(self, stack=16384):
+        # type: (int) -> None
+        """
+        Start the worker thread.
+
+        Args:
+            stack (int): Thread stack size in bytes, TLS needs a deep stack.
+        """
+        self.running = True
+        self.stopped = False
+        _thread.stack_size(stack)
+        _thread.start_new_thread(self._run, ())
+
+    def stop(self, timeout=None):
+        # type: (int) -> bool
+        """
+        Ask the worker to stop after its current fetch.
+
+        Args:
+            timeout (int): Milliseconds to wait for the thread to end, None
+                to return at once.
+
+        Returns:
+            bool: True if the thread has ended.
+        """
+        self.running = False
+        if timeout is not None:
+            start = time.ticks_ms()
+            while (
+                not self.stopped and time.ticks_diff(time.ticks_ms(), start) < timeout
+            ):
+                time.sleep_ms(10)
+
+        return self.stopped
+
+    def _run(self):
+        # type: () -> None
+        """
+        Thread body. An exception is kept in error for the event loop to
+        report, as it cannot propagate out of the thread.
+        """
+        try:
+            checked = time.ticks_ms()
+            while self.running:
+                online = self.online is None or self.online()
+                if time.ticks_diff(time.ticks_ms(), checked) >= self.wifi_interval:
+                    checked = time.ticks_ms()
+                    if not online and self.reconnect is not None:
+                        self.reconnect()
+                if online:
+                    for item in self.fetch() or ():
+                        self.post(item)
+                time.sleep_ms(self.interval)
+        except Exception as e:
+            self.error = e
+            self.running = False
+        self.stopped = True
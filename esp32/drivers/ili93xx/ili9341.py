@@ -52,6 +52,7 @@ class ILI9341(framebuf.FrameBuffer):
         self.width = width
         self._spi_init = init_spi
         mode = framebuf.GS4_HMSB
+        self.mode = mode
         self.palette = BoolPalette(mode)
         gc.collect()
         buf = bytearray(self.height * self.width // 2)
@@ -145,6 +146,33 @@ class ILI9341(framebuf.FrameBuffer):
             self._spi.write(lb)
         self._cs(1)
 
+    # Copy only the rectangle x, y, w, h to the display. Columns are widened to
+    # whole bytes of the 4-bit frame buffer.
+    @micropython.native
+    def show_rect(self, x, y, w, h):
+        x0 = max(x, 0) & ~1
+        y0 = max(y, 0)
+        x1 = min((x + w - 1) | 1, self.width - 1)
+        y1 = min(y + h - 1, self.height - 1)
+        if x1 < x0 or y1 < y0:
+            return
+        clut = ILI9341.lut
+        wd = self.width // 2
+        nb = (x1 - x0 + 1) // 2  # Source bytes per line
+        lb = memoryview(self._linebuf)[: nb * 4]
+        buf = self._mvb
+        if self._spi_init:  # A callback was passed
+            self._spi_init(self._spi)  # Bus may be shared
+        self._wcd(b"\x2a", int.to_bytes((x0 << 16) | x1, 4, "big"))  # SET_COLUMN
+        self._wcd(b"\x2b", int.to_bytes((y0 << 16) | y1, 4, "big"))  # SET_PAGE
+        self._wcmd(b"\x2c")  # WRITE_RAM
+        self._dc(1)
+        self._cs(0)
+        for start in range(y0 * wd + x0 // 2, (y1 + 1) * wd, wd):  # For each line
+            _lcopy(lb, buf[start:], clut, nb)  # Copy and map colors
+            self._spi.write(lb)
+        self._cs(1)
+
     async def do_refresh(self, split=4):
         async with self._lock:
             lines, mod = divmod(self.height, split)  # Lines per segment
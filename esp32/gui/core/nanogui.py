@@ -33,7 +33,12 @@ def fillcircle(dev, x0, y0, r, color):  # Draw filled circle
 # None causes pending widgets to be drawn and the result to be copied to hardware.
 # The pend mechanism enables a displayable object to postpone its renedering
 # until it is complete: efficient for e.g. Dial which may have multiple Pointers
-def refresh(device, clear=False):
+# partial=True copies only the dirty rectangles of pending objects to hardware,
+# provided the driver implements .show_rect(). Objects updated by direct calls
+# (e.g. Label.value) are not pending and still need a full refresh.
+# With show=False pending objects are drawn to the framebuffer only, leaving
+# the copy to the display to the caller, e.g. with an async do_refresh.
+def refresh(device, clear=False, partial=False, show=True):
     if not isinstance(device, framebuf.FrameBuffer):
         raise ValueError("Device must be derived from FrameBuffer.")
     if device not in DObject.devices:
@@ -44,10 +49,18 @@ def refresh(device, clear=False):
             DObject.devices[device].clear()  # Clear the pending set
             device.fill(0)
         else:
-            for obj in DObject.devices[device]:
+            pending = DObject.devices[device]
+            if partial and hasattr(device, "show_rect"):
+                for obj in pending:
+                    obj.show()
+                    device.show_rect(*obj.dirty_rect())
+                pending.clear()
+                return
+            for obj in pending:
                 obj.show()
-            DObject.devices[device].clear()
-    device.show()
+            pending.clear()
+    if show:
+        device.show()
 
 
 # Displayable object: effectively an ABC for all GUI objects.
@@ -132,6 +145,10 @@ class DObject:
             )
             self.has_border = True
 
+    # Area (x, y, width, height) changed by the last .show(), border included.
+    def dirty_rect(self):
+        return self.col - 2, self.row - 2, self.width + 4, self.height + 4
+
     def value(self, v=None):
         if v is not None:
             self._value = v
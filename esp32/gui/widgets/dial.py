@@ -4,6 +4,8 @@
 # Copyright (c) 2018-2020 Peter Hinch
 
 import cmath
+import framebuf
+from array import array
 from gui.core.nanogui import DObject, circle, fillcircle
 from gui.widgets.label import Label
 
@@ -46,11 +48,37 @@ def arrow(
         polar(dev, origin + conj(start), chev * cw * uv, color)
 
 
+# Integer endpoint table for a clock hand: (dx, dy) pixel offsets from the dial
+# origin for each of n equally spaced positions, clockwise from 12 o'clock.
+# Computed once per (radius, length, n) so hands never need trigonometry per tick.
+_tables = {}
+
+
+def hand_table(radius, length, n):
+    key = (radius, length, n)
+    if key not in _tables:
+        table = array("h", bytes(4 * n))
+        r = length * radius
+        for pos in range(n):
+            z = cmath.rect(r, cmath.pi / 2 - 2 * cmath.pi * pos / n)
+            table[2 * pos] = round(z.real)
+            table[2 * pos + 1] = round(-z.imag)
+        _tables[key] = table
+    return _tables[key]
+
+
 class Pointer:
-    def __init__(self, dial):
+    # length and positions select clock mode: the hand is drawn from an integer
+    # endpoint table and set with .position() rather than a complex .value().
+    def __init__(self, dial, length=None, positions=None):
         self.dial = dial
         self.val = 0 + 0j
         self.color = None
+        self.table = None
+        self.pos = 0
+        if positions is not None:
+            self.length = 1 if length is None else length
+            self.table = hand_table(dial.radius, self.length, positions)
 
     def value(self, v=None, color=None):
         self.color = color
@@ -67,6 +95,20 @@ class Pointer:
         self.dial._set_pend(self.dial)  # avoid redrawing for each vector
         return self.val
 
+    def position(self, pos=None, color=None):
+        if self.table is None:
+            raise ValueError("Pointer has no endpoint table.")
+        self.color = color
+        if pos is not None:
+            self.pos = pos % (len(self.table) >> 1)
+        self.dial.vectors.add(self)
+        self.dial._set_pend(self.dial)
+        return self.pos
+
+
+# Bits per pixel of framebuf formats which a cached dial face can use.
+_BPP = {framebuf.GS4_HMSB: 4, framebuf.GS8: 8, framebuf.RGB565: 16}
+
 
 class Dial(DObject):
     CLOCK = 0
@@ -85,7 +127,8 @@ class Dial(DObject):
         ticks=4,
         label=None,
         style=0,
-        pip=None
+        pip=None,
+        cache=False
     ):
         super().__init__(writer, row, col, height, height, fgcolor, bgcolor, bdcolor)
         self.style = style
@@ -98,33 +141,124 @@ class Dial(DObject):
         self.xorigin = col + radius
         self.yorigin = row + radius
         self.vectors = set()
+        # Tick endpoints (x0, y0, x1, y1) are fixed: compute them once.
+        self.tick_table = array("h", bytes(8 * ticks))
+        vor = self.xorigin + 1j * self.yorigin
+        vtstart = 0.9 * radius + 0j  # start of tick
+        vtick = 0.1 * radius + 0j  # tick
+        vrot = cmath.exp(2j * cmath.pi / ticks)  # unit rotation
+        for n in range(0, 4 * ticks, 4):
+            vs = vor + conj(vtstart)
+            self.tick_table[n] = round(vs.real)
+            self.tick_table[n + 1] = round(vs.imag)
+            self.tick_table[n + 2] = round(vs.real + vtick.real)
+            self.tick_table[n + 3] = round(vs.imag - vtick.imag)
+            vtick *= vrot
+            vtstart *= vrot
+        # cache=True keeps a copy of the static face (background, ticks, circle).
+        # Later redraws restore the face under the old hands only and draw the
+        # new ones; .dirty_rect() then reports just the area the hands touched.
+        # Needs a device exposing its framebuf format as .mode (see _BPP).
+        self.cache = cache and getattr(self.device, "mode", None) in _BPP
+        self.face = None
+        self.drawn = None  # (x0, y0, x1, y1) of hands on screen, inclusive
+        self.dirty = None
+
+    def _cache_face(self):
+        dev = self.device
+        mode = dev.mode
+        x = self.col & ~1  # Byte aligned for sub 8-bit formats
+        w = (self.col + self.width - x + 1) & ~1
+        h = self.height
+        buf = bytearray(w * h * _BPP[mode] // 8)
+        face = framebuf.FrameBuffer(buf, w, h, mode)
+        y = self.row
+        for row in range(h):
+            for col in range(w):
+                face.pixel(col, row, dev.pixel(x + col, y + row))
+        self.face = memoryview(buf)
+        self.face_box = (x, y, w, h)
+
+    # Copy the cached face back over the inclusive rectangle box.
+    def _restore(self, box):
+        fx, fy, fw, _ = self.face_box
+        mode = self.device.mode
+        x0 = box[0] & ~1
+        x1 = box[2] | 1
+        off = ((box[1] - fy) * fw + x0 - fx) * _BPP[mode] // 8
+        self.device.blit(
+            (self.face[off:], x1 - x0 + 1, box[3] - box[1] + 1, mode, fw),
+            x0,
+            box[1],
+        )
+
+    def dirty_rect(self):
+        if self.dirty is None:
+            return super().dirty_rect()
+        return self.dirty
 
     def show(self):
+        if self.face is not None:
+            old = self.drawn
+            self._restore(old)
+            new = self._hands()
+            self.drawn = new
+            x0 = min(old[0], new[0])
+            y0 = min(old[1], new[1])
+            self.dirty = (
+                x0,
+                y0,
+                max(old[2], new[2]) - x0 + 1,
+                max(old[3], new[3]) - y0 + 1,
+            )
+            return
         super().show()
         # cache bound variables
         dev = self.device
-        ticks = self.ticks
+        tt = self.tick_table
+        for n in range(0, len(tt), 4):
+            dev.line(tt[n], tt[n + 1], tt[n + 2], tt[n + 3], self.fgcolor)
+        circle(dev, self.xorigin, self.yorigin, self.radius, self.fgcolor)
+        if self.cache:
+            self._cache_face()
+        self.drawn = self._hands()
+        self.dirty = None
+
+    # Draw all vectors and the pip. Returns their inclusive bounding box.
+    def _hands(self):
+        dev = self.device
         radius = self.radius
         xo = self.xorigin
         yo = self.yorigin
-        # vectors (complex)
+        x0 = x1 = xo
+        y0 = y1 = yo
         vor = xo + 1j * yo
-        vtstart = 0.9 * radius + 0j  # start of tick
-        vtick = 0.1 * radius + 0j  # tick
-        vrot = cmath.exp(2j * cmath.pi / ticks)  # unit rotation
-        for _ in range(ticks):
-            polar(dev, vor + conj(vtstart), vtick, self.fgcolor)
-            vtick *= vrot
-            vtstart *= vrot
-        circle(dev, xo, yo, radius, self.fgcolor)
         vshort = 1000  # Length of shortest vector
         for v in self.vectors:
             color = self.fgcolor if v.color is None else v.color
+            if v.table is not None:  # Clock mode: integer table lookup
+                t = v.table
+                i = v.pos << 1
+                xe = xo + t[i]
+                ye = yo + t[i + 1]
+                dev.line(xo, yo, xe, ye, color)
+                vshort = min(vshort, v.length * radius)
+                x0 = min(x0, xe)
+                x1 = max(x1, xe)
+                y0 = min(y0, ye)
+                y1 = max(y1, ye)
+                continue
             val = v.value() * radius  # val is complex
             vshort = min(vshort, cmath.polar(val)[0])
             if self.style == Dial.CLOCK:
                 polar(dev, vor, val, color)
             else:
                 arrow(dev, vor, val, 5, color)
+            # Free vectors may reach anywhere on the face
+            x0, y0 = self.col, self.row
+            x1, y1 = self.col + self.width - 1, self.row + self.height - 1
         if isinstance(self.pip, int) and vshort > 5:
             fillcircle(dev, xo, yo, 2, self.pip)
+            x0, y0 = min(x0, xo - 2), min(y0, yo - 2)
+            x1, y1 = max(x1, xo + 2), max(y1, yo + 2)
+        return x0, y0, x1, y1
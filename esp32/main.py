@@ -7,21 +7,22 @@ electricity price data via API and display it on the screen.
 
 import os
 import gc
-import time as pytime
+import asyncio
+import network
 from app import utils
 from app.swe_time import SweTime
+from app.clock import Clock
 from app.price import ElectricityPriceAPI
 from app.ili9341 import GUI
-from gui.core.colors import RED, YELLOW
-from gui.core.nanogui import refresh
-from gui.color_setup import ssd
+from app.runtime import Runtime
+from app.worker import PriceWorker
 
 
 def main():
     # type: () -> None
     """
     Initialise classes for fetching spot prices and displaying objects.
-    Run scheduling with clock.
+    Run the clock, price, NTP and WiFi tasks on the asyncio event loop.
     """
 
     if "config.json" not in os.listdir():
@@ -32,69 +33,58 @@ def main():
 
     else:
         utils.wifi()
-        time = SweTime()
-
-        api = ElectricityPriceAPI(time.utc_time())
-        prices_today, prices_tomorrow, dst_offset = api.get_prices(time.utc_time())
+        ntp = SweTime()
+        clock = Clock()
 
         print(
-            f"Time offset today is {dst_offset} hours, {'DST is effect.' if dst_offset == 2 else 'CET in effect.'}"
+            f"Time offset today is {clock.dst_offset} hours, {'DST is effect.' if clock.dst_offset == 2 else 'CET in effect.'}"
         )
 
+        api = ElectricityPriceAPI(clock)
+        prices_today, prices_tomorrow, prices_yesterday = api.get_prices()
+
         print("Preparing display...")
 
-        # Calculate current 15-minute interval (0-95)
-        current_time = time.swe_localtime(dst_offset)
-        current_15min = (current_time.hour * 4) + (current_time.minute // 15)
+        clock.tick()
+        current_15min = clock.slot
 
         gui = GUI()
-        gui.plot_prices(prices_today, prices_tomorrow)
-        gui.set_price(current_15min, prices_today)
-        gui.set_arrow(current_time.hour)
-        uv, pi, days, months, dial, hrs, mins, secs, hstart, mstart, sstart = (
-            gui.set_clock()
+        gui.show_zone(
+            api.zones[0], prices_today, prices_tomorrow, current_15min, prices_yesterday
         )
+        gui.set_now(current_15min)
 
         print(
-            f"Boot sequence completed @ {time.swe_localtime(dst_offset).year}-{time.swe_localtime(dst_offset).month}-{time.swe_localtime(dst_offset).day} {time.swe_localtime(dst_offset).hour}:{time.swe_localtime(dst_offset).minute}:{time.swe_localtime(dst_offset).second}"
+            f"Boot sequence completed @ {clock.year}-{clock.month}-{clock.day} {clock.hour}:{clock.minute}:{clock.second}"
         )
 
         gc.collect()
         print(f"Free memory after running gc.collect(): {gc.mem_free()}")
 
-        while True:
-            hrs.value(
-                hstart
-                * uv(
-                    -time.swe_localtime(dst_offset).hour * pi / 6
-                    - time.swe_localtime(dst_offset).minute * pi / 360
-                ),
-                YELLOW,
-            )
-            mins.value(
-                mstart * uv(-time.swe_localtime(dst_offset).minute * pi / 30), YELLOW
-            )
-            secs.value(
-                sstart * uv(-time.swe_localtime(dst_offset).second * pi / 30), RED
-            )
-            dial.text(
-                "{} {} {}".format(
-                    days[time.swe_localtime(dst_offset).weekday()],
-                    time.swe_localtime(dst_offset).day,
-                    months[time.swe_localtime(dst_offset).month - 1],
+        worker = None
+        if api.config.get("worker", False):
+            if PriceWorker.available():
+                worker_clock = Clock()  # The worker thread's own snapshot
+                fetched = {zone: s.date for zone, s in prices_tomorrow.items()}
+                worker = PriceWorker(
+                    lambda: api.fetch_tomorrow(worker_clock.tick(), fetched),
+                    online=network.WLAN(network.STA_IF).isconnected,
+                    reconnect=utils.reconnect_wifi,
                 )
-            )
-            refresh(ssd)
-
-            current_15min, prices_today, prices_tomorrow = utils.update_display(
-                gui,
-                prices_today,
-                prices_tomorrow,
-                current_15min,
-                api,
-                time.swe_localtime(dst_offset),
-            )
-            pytime.sleep(1)
+            else:
+                print("Threads not supported, networking runs in the event loop")
+
+        runtime = Runtime(
+            gui,
+            api,
+            ntp,
+            clock,
+            prices_today,
+            prices_tomorrow,
+            prices_yesterday,
+            worker,
+        )
+        asyncio.run(runtime.run())
 
 
 if __name__ == "__main__":
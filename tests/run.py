@@ -0,0 +1,81 @@
+"""
+Run the tests on the unix port of MicroPython.
+
+Runs on the development machine with CPython 3.9 or later, from the
+repository root:
+
+    python3 tests/run.py [--micropython PATH] [test_stream ...]
+
+Starts the stand-in servers in tests/servers.py from tools/ on localhost,
+then runs each tests/test_*.py with the MicroPython binary, or only the
+tests named on the command line. Exits with status 1 if any test failed.
+"""
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from servers import HOST, SERVERS
+
+
+def start(servers):
+    # type: (tuple) -> list
+    """
+    Start the stand-in servers, each on a daemon thread.
+
+    Args:
+        servers (tuple): (tool in tools/, port, options) per server.
+
+    Returns:
+        list: The running servers.
+    """
+    running = []
+    for tool, port, options in servers:
+        module = importlib.import_module(tool)
+        args = ["--host", HOST, "--port", str(port), "--quiet"] + options
+        server = module.serve(module.parse_args(args))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        running.append(server)
+
+    return running
+
+
+def main():
+    # type: () -> None
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--micropython", default="micropython")
+    parser.add_argument("tests", nargs="*", help="Test modules, default all")
+    options = parser.parse_args()
+
+    os.chdir(ROOT)
+    names = options.tests or sorted(
+        name[:-3]
+        for name in os.listdir("tests")
+        if name.startswith("test_") and name.endswith(".py")
+    )
+    start(SERVERS)
+    # The RTC of the device runs on UTC, and time.mktime of the unix port
+    # uses the local time zone
+    env = dict(os.environ, TZ="UTC")
+
+    failed = []
+    for name in names:
+        print(f"--- {name}")
+        result = subprocess.run([options.micropython, f"tests/{name}.py"], env=env)
+        if result.returncode:
+            failed.append(name)
+
+    print(f"{len(names) - len(failed)} of {len(names)} test modules passed")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+The local stand-in servers tests/run.py starts for the tests.
+
+Imported by the runner on CPython and by the tests on MicroPython, so it only
+holds constants.
+"""
+
+HOST = "127.0.0.1"
+
+PRICES = 8101  # Payloads from tests/data, synthetic prices for other days
+PRICES_CLOSE = 8102  # Closes the connection after each response
+PRICES_IDLE = 8103  # Drops connections idle for 0.3 s
+PRICES_TRUNCATE = 8104  # Closes the connection 100 bytes into a body
+PRICES_ERROR = 8105  # Answers every GET and HEAD with 503
+PRICES_CHUNKED = 8106  # Chunked bodies in 2000-byte pieces over keep-alive
+PRICES_CHUNKED_CLOSE = 8107  # Chunked bodies, closing after each response
+PRICES_PUBLISHED = 8108  # Tomorrow is already published
+PRICES_PUBLISH = 8109  # Publishes tomorrow 1.5 s after it is first asked for
+NTP = 8121  # A clock 1.5 s ahead
+NTP_DRIFT = 8122  # A clock running 5 % fast
+NTP_DROP = 8123  # Leaves the first request unanswered
+NTP_OFFSET = 1500  # ms
+
+# (tool in tools/, port, options)
+SERVERS = (
+    ("price_server", PRICES, ["--data", "tests/data"]),
+    ("price_server", PRICES_CLOSE, ["--data", "tests/data", "--close"]),
+    ("price_server", PRICES_IDLE, ["--data", "tests/data", "--idle-timeout", "0.3"]),
+    ("price_server", PRICES_TRUNCATE, ["--data", "tests/data", "--truncate", "100"]),
+    ("price_server", PRICES_ERROR, ["--data", "tests/data", "--error", "503"]),
+    (
+        "price_server",
+        PRICES_CHUNKED,
+        ["--data", "tests/data", "--chunked", "--bandwidth", "20000"],
+    ),
+    (
+        "price_server",
+        PRICES_CHUNKED_CLOSE,
+        ["--data", "tests/data", "--chunked", "--close"],
+    ),
+    ("price_server", PRICES_PUBLISHED, ["--data", "tests/data", "--publish", "00:00"]),
+    ("price_server", PRICES_PUBLISH, ["--data", "tests/data", "--publish", "+1.5"]),
+    ("ntp_server", NTP, ["--offset", str(NTP_OFFSET)]),
+    ("ntp_server", NTP_DRIFT, ["--drift", "50000"]),
+    ("ntp_server", NTP_DROP, ["--drop", "1"]),
+)
@@ -0,0 +1,80 @@
+"""
+Helpers for the tests, which run on the unix port of MicroPython.
+
+This module includes functions to:
+- Run the test functions of a test module and report the result
+- Measure the heap allocated while running a piece of code
+- Build URLs of the stand-in servers started by tests/run.py
+"""
+
+import gc
+import sys
+
+sys.path.insert(0, "esp32")
+
+from servers import HOST
+
+
+def run(namespace):
+    # type: (dict) -> None
+    """
+    Run every function named test_* in a module namespace, in name order,
+    and exit with status 1 if any of them failed.
+
+    Args:
+        namespace (dict): globals() of the test module.
+    """
+    failed = 0
+    names = sorted(name for name in namespace if name.startswith("test_"))
+    for name in names:
+        try:
+            namespace[name]()
+        except Exception as e:
+            failed += 1
+            print(f"FAIL {name}")
+            sys.print_exception(e)
+        else:
+            print(f"ok   {name}")
+    print(f"{len(names) - failed} passed, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+class Heap:
+    """
+    Peak heap allocated since the start of a measurement.
+
+    Garbage is collected at the start, so the peak counts the objects made
+    while measuring, including any that are garbage by the end.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        gc.collect()
+        self.base = gc.mem_alloc()
+        self.peak = 0
+
+    def sample(self):
+        # type: () -> None
+        """
+        Update the peak, call it where the heap may be at its largest.
+        """
+        self.peak = max(self.peak, gc.mem_alloc() - self.base)
+
+
+def url(port, path=""):
+    # type: (int, str) -> str
+    """
+    Get the URL of a stand-in server.
+    """
+    return f"http://{HOST}:{port}{path}"
+
+
+def prices_path(date, zone="SE3"):
+    # type: (tuple, str) -> str
+    """
+    Get the API path of the prices of a day.
+    """
+    year, month, day = date
+
+    return f"/api/v1/prices/{year:04}/{month:02}-{day:02}_{zone}.json"
@@ -0,0 +1,148 @@
+"""
+Tests for app.http against the fault modes of tools/price_server.py.
+
+Each server drops, cuts short, fails or chunks responses in one way. The
+tests check when the client reuses its connection, when it retries on a new
+one, and what it returns or raises when it does not.
+"""
+
+import asyncio
+import time
+from support import run, url, prices_path
+from servers import (
+    PRICES,
+    PRICES_CLOSE,
+    PRICES_IDLE,
+    PRICES_TRUNCATE,
+    PRICES_ERROR,
+    PRICES_CHUNKED,
+    PRICES_CHUNKED_CLOSE,
+)
+from app.http import HTTPClient, AsyncHTTPClient
+
+PATH = prices_path((2025, 10, 27))
+DATA = "tests/data/2025/10-27_SE3.json"
+
+
+class Body:
+    """
+    Sink keeping the body bytes it is given.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.data = bytearray()
+        self.size = 0
+
+    def __call__(self, buf, i, n):
+        # type: (bytearray, int, int) -> None
+        self.data += buf[i:n]
+        self.size += n - i
+
+
+def test_keep_alive_reused():
+    client = HTTPClient()
+    for method in ("HEAD", "GET", "GET"):
+        assert client.request(method, url(PRICES, PATH), Body()) == 200
+    client.close()
+    assert (client.connects, client.requests) == (1, 3)
+
+
+def test_close_reconnects():
+    client = HTTPClient()
+    for _ in range(2):
+        body = Body()
+        assert client.request("GET", url(PRICES_CLOSE, PATH), body) == 200
+        assert body.size > 0
+        assert client._sock is None  # Closed after each response
+    assert (client.connects, client.requests) == (2, 2)
+
+
+def test_idle_timeout_retried():
+    client = HTTPClient()
+    assert client.request("GET", url(PRICES_IDLE, PATH), Body()) == 200
+    time.sleep_ms(600)  # The server drops the connection meanwhile
+    body = Body()
+    assert client.request("GET", url(PRICES_IDLE, PATH), body) == 200
+    client.close()
+    assert body.size > 0
+    assert (client.connects, client.requests) == (2, 2)  # One retry, one request
+
+
+def test_truncated_raises():
+    client = HTTPClient()
+    for _ in range(2):  # A truncated body is not retried
+        try:
+            client.request("GET", url(PRICES_TRUNCATE, PATH), Body())
+        except OSError as e:
+            assert "Truncated" in str(e), e
+        else:
+            assert False, "No OSError"
+        assert client._sock is None
+    assert client.connects == 2
+    assert client.request("HEAD", url(PRICES_TRUNCATE, PATH)) == 200  # No body
+    client.close()
+
+
+def test_error_status_returned():
+    client = HTTPClient()
+    body = Body()
+    assert client.request("GET", url(PRICES_ERROR, PATH), body) == 503
+    assert body.size == 0  # The error body is read but not passed on
+    assert client.request("HEAD", url(PRICES_ERROR, PATH)) == 503
+    client.close()
+    assert (client.connects, client.requests) == (1, 2)
+
+
+def test_chunked_decoded():
+    with open(DATA, "rb") as f:
+        payload = f.read()
+    for port, connects in ((PRICES_CHUNKED, 1), (PRICES_CHUNKED_CLOSE, 2)):
+        client = HTTPClient()
+        for _ in range(2):
+            body = Body()
+            assert client.request("GET", url(port, PATH), body) == 200
+            assert bytes(body.data) == payload, port
+        client.close()
+        assert (client.connects, client.requests) == (connects, 2), port
+
+
+def test_refused_raises():
+    client = HTTPClient(connect_timeout=1)
+    try:
+        client.request("GET", url(9, PATH))  # Nothing listens on the port
+    except OSError:
+        pass
+    else:
+        assert False, "No OSError"
+    assert (client.connects, client._sock) == (0, None)
+
+
+def test_async_idle_timeout_retried():
+    client = AsyncHTTPClient()
+
+    async def fetch():
+        statuses = []
+        for _ in range(2):
+            statuses.append(await client.request("GET", url(PRICES_IDLE, PATH)))
+            await asyncio.sleep_ms(600)
+        client.close()
+        return statuses
+
+    assert asyncio.run(fetch()) == [200, 200]
+    assert (client.connects, client.requests) == (2, 2)
+
+
+def test_async_truncated_raises():
+    client = AsyncHTTPClient()
+    try:
+        asyncio.run(client.request("GET", url(PRICES_TRUNCATE, PATH), Body()))
+    except OSError as e:
+        assert "Truncated" in str(e), e
+    else:
+        assert False, "No OSError"
+    assert (client.connects, client._sock) == (1, None)
+
+
+if __name__ == "__main__":
+    run(globals())
@@ -0,0 +1,78 @@
+"""
+Tests for app.swe_time against tools/ntp_server.py.
+
+The unix port has no RTC to set, so the tests run SweTime on a simulated
+RTC: the host clock plus the steps SweTime applies to it.
+"""
+
+import time
+import asyncio
+from support import run
+from servers import HOST, NTP, NTP_DRIFT, NTP_DROP, NTP_OFFSET
+from app.swe_time import SweTime
+
+
+class Rig(SweTime):
+    """
+    SweTime on a simulated RTC.
+    """
+
+    _DRIFT_SPAN = 1000  # Estimate the drift over seconds, not minutes
+    _BOOT_BACKOFF = 1000
+
+    def __init__(self, port, **config):
+        # type: (int, dict) -> None
+        self.shift = 0  # ms the simulated RTC is ahead of the host
+        config["ntp_host"] = HOST
+        config["ntp_port"] = port
+        config.setdefault("ntp_timeout", 1)
+        super().__init__(config)
+
+    def _rtc_ms(self):
+        # type: () -> int
+        return time.time_ns() // 1_000_000 + self.shift
+
+    def _set_rtc(self, ms):
+        # type: (int) -> None
+        self.shift += ms - self._rtc_ms()
+
+
+def test_sync_steps_rtc():
+    ntp = Rig(NTP)
+    assert abs(ntp.shift - NTP_OFFSET) < 50, ntp.shift
+    assert ntp.failures == 0
+    assert abs(ntp._query()) < 50  # Already in step
+
+
+def test_failed_query_backs_off():
+    start = time.ticks_ms()
+    ntp = Rig(NTP_DROP, ntp_timeout=0.2)  # An hour between syncs
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    assert 1000 <= elapsed < 3000, elapsed  # Timed out, waited 1 s, retried
+    assert ntp.failures == 0
+
+    ntp.port = 9  # Nothing answers
+    assert not ntp.sync()
+    assert ntp.failures == 1
+    backoff = time.ticks_diff(ntp._next, time.ticks_ms())
+    assert 9000 < backoff <= 10000, backoff  # Not capped once synced
+    assert not ntp.sync()
+    assert ntp.failures == 2
+    assert time.ticks_diff(ntp._next, time.ticks_ms()) > 0  # Retry scheduled
+
+
+def test_drift_estimated_and_corrected():
+    ntp = Rig(NTP_DRIFT)
+    time.sleep_ms(2000)
+    assert ntp.sync()
+    assert 40000 < ntp.drift < 60000, ntp.drift  # The RTC is 5 % slow
+
+    time.sleep_ms(1500)
+    lag = ntp._query()  # About 75 ms behind by now
+    assert lag > 50, lag
+    assert asyncio.run(ntp.poll(step=20))  # Drift correction, not a resync
+    assert abs(ntp._query()) < lag // 2
+
+
+if __name__ == "__main__":
+    run(globals())
@@ -0,0 +1,62 @@
+"""
+Tests for polling tomorrow's prices against tools/price_server.py.
+
+The server publishes tomorrow 1.5 s after it is first asked for, so the
+polls before that miss and back off, and the one after fetches the day.
+"""
+
+import os
+import time
+from support import run, url
+from servers import PRICES_PUBLISH
+from app.clock import Clock
+from app.cache import PriceCache
+from app.price import ElectricityPriceAPI
+
+CACHE = "/tmp/kwh_display_test_poll.bin"
+CONFIG = {
+    "url": url(PRICES_PUBLISH),
+    "api": "/api/v1/prices/",
+    "zones": ["SE3"],
+    "poll_after": 0,
+    "poll_interval": 0.2,
+    "poll_max_interval": 5,
+    "poll_jitter": 0,
+}
+
+
+def test_backs_off_until_published():
+    clock = Clock()
+    api = ElectricityPriceAPI(clock, CONFIG)
+    api.cache = PriceCache(CACHE)
+    day = clock.date(1)
+    assert api.http.request("HEAD", api._url(day)) == 404  # Not published yet
+
+    fetched = {}
+    delays = []
+    out = []
+    start = time.ticks_ms()
+    while not out and time.ticks_diff(time.ticks_ms(), start) < 10000:
+        out = api.fetch_tomorrow(clock.tick(), fetched)
+        if api.poll.misses > len(delays):
+            delays.append(api.poll.delay)
+        time.sleep_ms(20)
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+
+    assert delays[:3] == [200, 400, 800], delays  # Each miss waits longer
+    assert [series.date for series in out] == [day]
+    assert fetched == {"SE3": day}
+    assert (api.poll.misses, api.poll.delay) == (0, 0)  # Reset once fetched
+    assert elapsed >= 1500, elapsed
+    requests = api.http.requests
+    assert requests == 1 + len(delays) + 2, requests  # Probes, then HEAD and GET
+
+    assert api.fetch_tomorrow(clock.tick(), fetched) == []  # Fetched once
+    assert api.http.requests == requests
+    assert api.cache.load("SE3", day) is not None
+    api.http.close()
+    os.remove(CACHE)
+
+
+if __name__ == "__main__":
+    run(globals())
@@ -0,0 +1,53 @@
+"""
+Tests for app.series resampling on the days in tests/data.
+"""
+
+import json
+from array import array
+from support import run
+from app.series import PriceSeries
+
+DAYS = ((2025, 3, 30), (2025, 10, 26), (2025, 10, 27))
+
+
+def load(date):
+    # type: (tuple) -> PriceSeries
+    """
+    Get a day from tests/data as a series of 15-minute slots.
+    """
+    year, month, day = date
+    with open(f"tests/data/{year:04}/{month:02}-{day:02}_SE3.json") as f:
+        slots = json.load(f)
+    values = array("h", [round(slot["SEK_per_kWh"] * 100) for slot in slots])
+
+    return PriceSeries(date, "SE3", values)
+
+
+def test_hourly_matches_slots():
+    for date in DAYS:
+        series = load(date)
+        means, mins, maxs = series.resample(4)
+        assert len(means) == len(series) // 4, (date, len(means))
+        assert (means.slot, mins.slot, maxs.slot) == (60, 60, 60)
+        for h in range(len(means)):
+            group = series.values[4 * h : 4 * h + 4]
+            assert means[h] == (2 * sum(group) + 4) // 8, (date, h)
+            assert (mins[h], maxs[h]) == (min(group), max(group)), (date, h)
+
+
+def test_hours_keep_local_time():
+    series = load((2025, 10, 26))  # 25 hours, 02:00 twice
+    hours = [series.resample(4)[0].time(h)[0] for h in range(25)]
+    assert hours[:4] == [0, 1, 2, 2], hours
+    assert hours[-1] == 23
+
+
+def test_cached_and_identity():
+    series = load((2025, 10, 27))
+    assert series.resample(4) is series.resample(4)
+    assert series.resample(1) == (series, series, series)
+    assert len(series.resample(8)[0]) == 12
+
+
+if __name__ == "__main__":
+    run(globals())
@@ -0,0 +1,95 @@
+"""
+Tests for app.stream against payloads in the format of the price API.
+
+The payloads in tests/data cover a 92-slot, a 100-slot and a normal day.
+Each is fed to the parser through a fixed bytearray in chunks of several
+sizes, as the HTTP client does, and fetched from tools/price_server.py to
+measure the heap used while fetching.
+"""
+
+import json
+from array import array
+from support import Heap, run, url, prices_path
+from servers import PRICES
+from app.http import HTTPClient
+from app.stream import PriceParser
+
+DAYS = ((2025, 3, 30), (2025, 10, 26), (2025, 10, 27))
+
+
+def payload(date):
+    # type: (tuple) -> bytes
+    """
+    Read the payload of a day from tests/data.
+    """
+    year, month, day = date
+    with open(f"tests/data/{year:04}/{month:02}-{day:02}_SE3.json", "rb") as f:
+        return f.read()
+
+
+def expected(data):
+    # type: (bytes) -> list
+    """
+    Get the prices of a payload in öre, rounded half away from zero.
+    """
+    out = []
+    for slot in json.loads(data):
+        v = round(slot["SEK_per_kWh"] * 100000)  # Five decimals, exact
+        out.append((v + 500) // 1000 if v >= 0 else -((500 - v) // 1000))
+
+    return out
+
+
+def test_values_match_json():
+    for date in DAYS:
+        data = payload(date)
+        want = expected(data)
+        for size in (1, 7, 256):  # Keys and numbers split across chunks
+            prices = array("h", bytes(200))
+            parser = PriceParser(prices)
+            buf = bytearray(size)
+            for i in range(0, len(data), size):
+                piece = data[i : i + size]
+                buf[: len(piece)] = piece
+                parser.feed(buf, 0, len(piece))
+            assert parser.count == len(want), (date, size, parser.count)
+            assert list(prices[: parser.count]) == want, (date, size)
+
+
+def test_slot_counts():
+    counts = [len(json.loads(payload(date))) for date in DAYS]
+    assert counts == [92, 100, 96], counts
+
+
+def test_fetch_heap():
+    date = (2025, 10, 26)
+    prices = array("h", bytes(200))
+    parser = PriceParser(prices)
+    client = HTTPClient()
+    client.request(
+        "HEAD", url(PRICES, prices_path(date))
+    )  # Not counted: first-use allocations
+    client.close()
+    heap = Heap()
+
+    def sink(buf, i, n):
+        parser.feed(buf, i, n)
+        heap.sample()
+
+    status = client.request("GET", url(PRICES, prices_path(date)), sink)
+    client.close()
+    assert status == 200, status
+    assert list(prices[: parser.count]) == expected(payload(date))
+
+    data = payload(date)
+    decoded = Heap()
+    slots = json.loads(data)
+    decoded.sample()
+    print(f"peak heap: streaming {heap.peak} bytes, json.loads {decoded.peak} bytes")
+    assert len(slots) == parser.count
+    assert heap.peak < 4096, heap.peak
+    assert heap.peak * 8 < decoded.peak, (heap.peak, decoded.peak)
+
+
+if __name__ == "__main__":
+    run(globals())
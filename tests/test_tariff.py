@@ -0,0 +1,36 @@
+"""
+Tests for app.tariff loading from config.json.
+"""
+
+from support import run
+from app.tariff import Tariff
+
+TIME_OF_USE = {"from": 6, "to": 22, "fee": 0.2, "months": [1, 2, 3]}
+
+
+def test_valid_loaded():
+    tariff = Tariff.from_config(
+        {"tariff": {"grid_fee": 0.3, "energy_tax": 0.439, "time_of_use": [TIME_OF_USE]}}
+    )
+    assert tariff.base == 7390
+    assert tariff.time_of_use == [(6, 22, 2000, (1, 2, 3), False)]
+    assert Tariff.from_config({}) is None
+
+
+def test_invalid_falls_back():
+    for tariff in (
+        "0.5",  # Not a dict
+        [0.5],
+        {"markup": "0.5"},
+        {"grid": 0.3},  # Unknown key
+        {"vat": None},
+        {"time_of_use": [{"from": 6, "to": 22}]},  # No fee
+        {"time_of_use": [dict(TIME_OF_USE, months=1)]},
+        {"time_of_use": [dict(TIME_OF_USE, to="ten")]},
+        {"time_of_use": [[6, 22, 0.2]]},
+    ):
+        assert Tariff.from_config({"tariff": tariff}) is None, tariff
+
+
+if __name__ == "__main__":
+    run(globals())
@@ -0,0 +1,61 @@
+"""
+Tests for app.timeline with yesterday in the continuous graph.
+"""
+
+from array import array
+from support import run
+from app.series import PriceSeries
+from app.timeline import Timeline, NO_PRICES
+
+WIDTH = 192  # Four columns an hour over 48 hours, one per slot
+
+
+def day(date, price):
+    # type: (tuple, int) -> PriceSeries
+    """
+    Get a 96-slot day at one price.
+    """
+    return PriceSeries(date, "SE3", array("h", [price] * 96))
+
+
+def test_yesterday_shown_before_midnight():
+    yesterday = day((2025, 10, 27), 100)
+    today = day((2025, 10, 28), 200)
+    timeline = Timeline(WIDTH)
+    timeline.load(today, None, yesterday)
+    timeline.update(60)  # 01:00, the window starts 11 hours into yesterday
+    assert list(timeline.days[:44]) == [0] * 44
+    assert list(timeline.days[44:140]) == [1] * 96
+    assert list(timeline.days[140:]) == [NO_PRICES] * 52
+    assert (timeline.lows[0], timeline.highs[43]) == (100, 100)
+
+
+def test_yesterday_added_later():
+    today = day((2025, 10, 28), 200)
+    timeline = Timeline(WIDTH)
+    timeline.load(today, None)
+    timeline.update(60)
+    assert timeline.days[0] == NO_PRICES
+
+    timeline.load(today, None, day((2025, 10, 27), 100))
+    timeline.update(60)
+    assert timeline.days[0] == 0
+    timeline.load(today, None)  # Kept when not given
+    assert timeline.series[0] is not None
+
+
+def test_today_becomes_yesterday():
+    today = day((2025, 10, 28), 200)
+    tomorrow = day((2025, 10, 29), 300)
+    timeline = Timeline(WIDTH)
+    timeline.load(today, tomorrow)
+    timeline.update(23 * 60)
+    timeline.load(tomorrow, None)  # Midnight
+    timeline.update(0)
+    assert timeline.series[0] is today
+    assert list(timeline.days[:48]) == [0] * 48
+    assert timeline.highs[0] == 200
+
+
+if __name__ == "__main__":
+    run(globals())
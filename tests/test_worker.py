@@ -0,0 +1,187 @@
+"""
+Tests for app.worker with real threads, fetching tomorrow's prices from
+tools/price_server.py through ElectricityPriceAPI.fetch_tomorrow, as the
+device does.
+"""
+
+import os
+import time
+import _thread
+from array import array
+from support import run, url
+from servers import PRICES_PUBLISHED
+from app.clock import Clock
+from app.cache import PriceCache
+from app.price import ElectricityPriceAPI
+from app.series import PriceSeries
+from app.worker import Mailbox, PriceWorker
+
+STACK = 65536  # Desktop threads need more stack than the ESP32 default
+CACHE = "/tmp/kwh_display_test_worker.bin"
+CONFIG = {
+    "url": url(PRICES_PUBLISHED),
+    "api": "/api/v1/prices/",
+    "zones": ["SE3", "SE4"],
+    "poll_after": 0,
+    "poll_interval": 0.1,
+    "poll_jitter": 0,
+}
+
+
+class Fetch:
+    """
+    The fetch the device gives the worker, counting its calls.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.api = ElectricityPriceAPI(Clock(), CONFIG)
+        self.api.cache = PriceCache(CACHE)
+        self.clock = Clock()  # The worker thread's own snapshot
+        self.fetched = {}
+        self.calls = 0
+
+    def __call__(self):
+        # type: () -> list
+        self.calls += 1
+        return self.api.fetch_tomorrow(self.clock.tick(), self.fetched)
+
+    def close(self):
+        # type: () -> None
+        """
+        Close the connection and remove the cache file.
+        """
+        self.api.http.close()
+        try:
+            os.remove(CACHE)
+        except OSError:
+            pass
+
+
+def wait(condition, timeout=5000):
+    # type: (function, int) -> bool
+    """
+    Wait until condition() is true, at most timeout ms.
+    """
+    start = time.ticks_ms()
+    while not condition():
+        if time.ticks_diff(time.ticks_ms(), start) > timeout:
+            return False
+        time.sleep_ms(10)
+
+    return True
+
+
+def test_mailbox_across_threads():
+    mailbox = Mailbox()
+    done = []
+
+    def produce():
+        for i in range(500):
+            mailbox.put(i)
+        done.append(True)
+
+    _thread.stack_size(STACK)
+    _thread.start_new_thread(produce, ())
+    taken = []
+
+    def received():
+        item = mailbox.take()
+        while item is not None:
+            taken.append(item)
+            item = mailbox.take()
+        return len(taken) == 500
+
+    assert wait(received)
+    assert done and mailbox.take() is None
+    assert taken == list(range(500)), taken[:10]
+
+
+def test_posts_tomorrow_once():
+    fetch = Fetch()
+    worker = PriceWorker(fetch, interval=20)
+    worker.start(STACK)
+    clock = Clock()
+    prices_today = {}
+    prices_tomorrow = {}
+
+    def received():
+        series = worker.mailbox.take()
+        while series is not None:  # As Runtime._mailbox takes them
+            assert ElectricityPriceAPI.add_series(
+                series, clock.tick(), prices_today, prices_tomorrow
+            )
+            series = worker.mailbox.take()
+        return len(prices_tomorrow) == 2
+
+    assert wait(received)
+    calls = fetch.calls
+    assert wait(lambda: fetch.calls > calls + 2)  # Polled on, nothing missing
+    assert worker.stop(1000)
+    assert worker.error is None, worker.error
+    day = clock.date(1)
+    assert fetch.fetched == {"SE3": day, "SE4": day}
+    assert [prices_tomorrow[zone].date for zone in ("SE3", "SE4")] == [day, day]
+    assert not prices_today
+    assert worker.mailbox.take() is None  # Each day is posted once
+    assert fetch.api.http.requests == 3  # One probe, a GET per zone
+    fetch.close()
+
+
+def test_posted_before_midnight_kept():
+    clock = Clock()
+    prices_today = {}
+    prices_tomorrow = {}
+    values = array("h", bytes(2 * 96))
+    late = PriceSeries(clock.date(), "SE3", values)  # Was tomorrow when fetched
+    stale = PriceSeries(clock.date(-1), "SE4", values)
+    added = ElectricityPriceAPI.add_series(late, clock, prices_today, prices_tomorrow)
+    assert added is prices_today and prices_today["SE3"] is late
+    assert (
+        ElectricityPriceAPI.add_series(stale, clock, prices_today, prices_tomorrow)
+        is None
+    )
+    assert not prices_tomorrow
+
+
+def test_stop_ends_thread():
+    fetch = Fetch()
+    worker = PriceWorker(fetch, interval=20)
+    worker.start(STACK)
+    assert wait(lambda: fetch.calls > 2)
+    assert worker.stop(1000)
+    calls = fetch.calls
+    time.sleep_ms(100)
+    assert fetch.calls == calls
+    fetch.close()
+
+
+def test_offline_reconnects():
+    fetch = Fetch()
+    reconnects = []
+    worker = PriceWorker(
+        fetch,
+        online=lambda: False,
+        reconnect=lambda: reconnects.append(True),
+        interval=20,
+        wifi_interval=0,
+    )
+    worker.start(STACK)
+    assert wait(lambda: len(reconnects) > 2)
+    assert worker.stop(1000)
+    assert fetch.calls == 0
+
+
+def test_error_stops_worker():
+    def fail():
+        raise ValueError("bad payload")
+
+    worker = PriceWorker(fail, interval=20)
+    worker.start(STACK)
+    assert wait(lambda: worker.stopped)
+    assert isinstance(worker.error, ValueError), worker.error
+    assert not worker.running
+
+
+if __name__ == "__main__":
+    run(globals())
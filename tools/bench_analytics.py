@@ -0,0 +1,100 @@
+"""
+Benchmark the ulab and pure-Python backends of app.analytics.
+
+Runs on the unix port of MicroPython, from the repository root. Build the
+port with ulab to compare both backends, otherwise only the Python backend
+is timed:
+
+    micropython tools/bench_analytics.py 200
+
+Every function is run on the same random series with both backends. The
+results are checked to be identical before the timings are printed.
+"""
+
+import sys
+import time
+import random
+from array import array
+
+sys.path.insert(0, "esp32")
+
+from app import analytics
+
+
+def cases(n):
+    # type: (int) -> list
+    """
+    Get the benchmarked calls on a random series of n slots.
+
+    Returns:
+        list: (name, function, args)
+    """
+    values = array("h", [random.getrandbits(12) - 500 for _ in range(n)])
+    offsets = array("i", [random.getrandbits(14) + 50 for _ in range(n)])
+
+    return [
+        ("extremes", analytics.extremes, (values,)),
+        ("sort", analytics.sort, (values,)),
+        ("window_sums k=8", analytics.window_sums, (values, 8)),
+        ("scale_offset", analytics.scale_offset, (values, 125, offsets)),
+        ("groups size=4", analytics.groups, (values, 4)),
+    ]
+
+
+def run(function, args, repeat):
+    # type: (function, tuple, int) -> tuple
+    """
+    Time a call.
+
+    Returns:
+        tuple: (result, microseconds per call)
+    """
+    start = time.ticks_us()
+    for _ in range(repeat):
+        result = function(*args)
+
+    return result, time.ticks_diff(time.ticks_us(), start) // repeat
+
+
+def same(a, b):
+    # type: (object, object) -> bool
+    """
+    Compare results, arrays by their items.
+    """
+    if isinstance(a, tuple):
+        return all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, int):
+        return a == b
+
+    return list(a) == list(b)
+
+
+def main(n=200, repeat=50):
+    # type: (int, int) -> None
+    """
+    Run every case with the available backends.
+
+    Args:
+        n (int): Slots in the series, 200 for today and tomorrow on a DST day.
+        repeat (int): Calls per timing.
+    """
+    backends = ["python"]
+    if analytics.np is not None:
+        backends.append("ulab")
+    print(f"{n} slots, {repeat} calls, backends: {', '.join(backends)}")
+
+    for name, function, args in cases(n):
+        results = {}
+        line = f"{name:16}"
+        for backend in backends:
+            analytics.use(backend)
+            results[backend], us = run(function, args, repeat)
+            line += f" {backend} {us:7} us"
+        if len(backends) == 2:
+            ok = same(results["python"], results["ulab"])
+            line += "  identical" if ok else "  DIFFERENT"
+        print(line)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
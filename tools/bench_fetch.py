@@ -0,0 +1,87 @@
+"""
+Benchmark fetching prices with the HTTP client and parser of the device.
+
+Runs on the unix port of MicroPython, from the repository root, against the
+real API or tools/price_server.py:
+
+    python3 tools/price_server.py --quiet --latency 50 --bandwidth 20000 &
+    micropython tools/bench_fetch.py http://127.0.0.1:8000 SE3 20
+
+Prints the fetch latency, the heap allocated while fetching, and how many
+requests failed and connections were opened. Run the server with fault
+options such as --truncate, --error 503 --error-rate 0.3 or --idle-timeout
+to see the retry behaviour.
+"""
+
+import gc
+import sys
+import time
+from array import array
+
+sys.path.insert(0, "esp32")
+
+from app.http import HTTPClient
+from app.stream import PriceParser
+
+
+def main(base, zone="SE3", n=10):
+    # type: (str, str, int) -> None
+    """
+    Fetch today's prices n times over one client.
+
+    Args:
+        base (str): Server URL without path.
+        zone (str): Bidding zone.
+        n (int): Number of fetches.
+    """
+    year, month, day = time.gmtime()[:3]
+    url = f"{base}/api/v1/prices/{year:04}/{month:02}-{day:02}_{zone}.json"
+    prices = array("h", bytes(200))
+    parser = PriceParser(prices)
+    client = HTTPClient()
+    peak = 0
+    base_heap = 0
+
+    def sink(buf, i, end):
+        nonlocal peak
+        parser.feed(buf, i, end)
+        peak = max(peak, gc.mem_alloc() - base_heap)
+
+    times = []
+    failures = 0
+    for _ in range(n):
+        parser.reset()
+        gc.collect()
+        base_heap = gc.mem_alloc()
+        start = time.ticks_us()
+        try:
+            status = client.request("GET", url, sink)
+        except OSError as e:
+            print(f"Request failed: {e}")
+            failures += 1
+            continue
+        times.append(time.ticks_diff(time.ticks_us(), start) // 1000)
+        if status != 200:
+            print(f"Status {status}")
+            failures += 1
+
+    client.close()
+    times.sort()
+    print(f"{url}: {parser.count} slots")
+    if times:
+        print(
+            f"latency ms min {times[0]} median {times[len(times) // 2]} max {times[-1]}"
+        )
+    print(f"heap allocated while fetching: {peak} bytes")
+    print(
+        f"{failures} failed of {client.requests} requests over {client.connects} connections"
+    )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        args[0] if args else "http://127.0.0.1:8000",
+        args[1] if len(args) > 1 else "SE3",
+        int(args[2]) if len(args) > 2 else 10,
+    )
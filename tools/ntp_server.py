@@ -0,0 +1,153 @@
+"""
+A local stand-in for an NTP server, for offline development and tests.
+
+Runs on the development machine with CPython 3.9 or later. Point the device,
+or the unix port of MicroPython, at it by setting "ntp_host" and "ntp_port"
+in config.json.
+
+This module includes functions to:
+- Answer SNTP client requests with the time of a simulated server clock
+- Offset the server clock and let it run fast or slow, so the client sees
+  an RTC that is off and drifting
+- Drop requests, so the client has to time out and back off
+"""
+
+import argparse
+import random
+import socket
+import socketserver
+import struct
+import time
+
+NTP_DELTA = 2208988800  # Seconds from 1900 to 1970
+
+
+class Clock:
+    """
+    Server clock, offset from and running at a rate relative to the host.
+    """
+
+    def __init__(self, offset=0, drift=0):
+        # type: (int, int) -> None
+        """
+        Initialize the clock.
+
+        Args:
+            offset (int): Milliseconds added to the host clock.
+            drift (int): Parts per million the clock runs fast, negative
+                when slow, counted from now.
+        """
+        self.start = time.time()
+        self.offset = offset / 1000
+        self.rate = 1 + drift / 1_000_000
+
+    def now(self):
+        # type: () -> float
+        """
+        Get the server time as a Unix epoch.
+        """
+        host = time.time()
+
+        return self.start + (host - self.start) * self.rate + self.offset
+
+
+def timestamp(t):
+    # type: (float) -> bytes
+    """
+    Pack a Unix epoch as an NTP timestamp.
+    """
+    seconds = int(t)
+
+    return struct.pack("!II", seconds + NTP_DELTA, int((t - seconds) * 2**32))
+
+
+class Handler(socketserver.BaseRequestHandler):
+    """
+    Request handler, configured through the options of the server.
+    """
+
+    def handle(self):
+        # type: () -> None
+        data, sock = self.request
+        server = self.server
+        options = server.options
+        server.stats["requests"] += 1
+        if len(data) < 48:
+            return
+        if (
+            server.stats["requests"] <= options.drop
+            or random.random() < options.drop_rate
+        ):
+            server.stats["dropped"] += 1
+            return
+
+        received = timestamp(server.clock.now())
+        reply = bytearray(48)
+        reply[0] = 0x1C  # LI 0, version 3, server mode
+        reply[1] = 1  # Stratum, a primary reference
+        reply[12:16] = b"LOCL"
+        reply[16:24] = received  # Reference
+        reply[24:32] = data[40:48]  # Originate, the client's transmit
+        reply[32:40] = received
+        reply[40:48] = timestamp(server.clock.now())  # Transmit
+        sock.sendto(reply, self.client_address)
+        if not options.quiet:
+            print(f"{self.client_address[0]} time {server.clock.now():.3f}")
+
+
+def parse_args(argv=None):
+    # type: (list) -> argparse.Namespace
+    """
+    Parse the command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=12300)
+    parser.add_argument(
+        "--offset", type=int, default=0, help="Milliseconds added to the host clock"
+    )
+    parser.add_argument(
+        "--drift", type=int, default=0, help="Parts per million the clock runs fast"
+    )
+    parser.add_argument(
+        "--drop", type=int, default=0, help="Leave the first N requests unanswered"
+    )
+    parser.add_argument(
+        "--drop-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of the other requests left unanswered",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Do not log requests")
+
+    return parser.parse_args(argv)
+
+
+def serve(options):
+    # type: (argparse.Namespace) -> socketserver.UDPServer
+    """
+    Create a server for the options. Call serve_forever() on it to run it.
+    """
+    server = socketserver.UDPServer((options.host, options.port), Handler)
+    server.options = options
+    server.clock = Clock(options.offset, options.drift)
+    server.stats = {"requests": 0, "dropped": 0}
+
+    return server
+
+
+def main():
+    # type: () -> None
+    options = parse_args()
+    server = serve(options)
+    host = socket.gethostbyname(socket.gethostname())
+    print(f"Serving time on {host}:{options.port} (UDP), Ctrl-C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"{server.stats['requests']} requests, {server.stats['dropped']} dropped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+A local stand-in for the elprisetjustnu.se price API, for offline development.
+
+Runs on the development machine with CPython 3.9 or later. Point the device,
+or the unix port of MicroPython, at it by setting "url" in config.json to
+e.g. "http://192.168.1.10:8000".
+
+This module includes functions to:
+- Serve /api/v1/prices/YYYY/MM-DD_SEx.json from recorded payloads, or from
+  synthetic prices with the real slot count, 92 and 100 on DST days
+- Record payloads from the real API for later offline use
+- Inject faults: latency, limited bandwidth, 404 until a publish time,
+  truncated bodies, error codes and dropped idle connections
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import re
+import socket
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo
+
+UPSTREAM = "https://www.elprisetjustnu.se"
+TZ = ZoneInfo("Europe/Stockholm")
+PATH = re.compile(r"^/api/v1/prices/(\d{4})/(\d{2})-(\d{2})_(SE[1-4])\.json$")
+ZONE_LEVEL = {"SE1": 0.35, "SE2": 0.4, "SE3": 0.9, "SE4": 1.2}  # SEK/kWh
+
+
+def slots(date):
+    # type: (datetime.date) -> list
+    """
+    Get the 15-minute slots of a Swedish calendar day.
+
+    Args:
+        date (datetime.date): Local date.
+
+    Returns:
+        list: (start, end) aware datetimes, 92 or 100 slots on DST days.
+    """
+    start = datetime.datetime.combine(date, datetime.time(), TZ)
+    end = datetime.datetime.combine(date + datetime.timedelta(1), datetime.time(), TZ)
+    t = start.astimezone(datetime.timezone.utc)
+    stop = end.astimezone(datetime.timezone.utc)
+    step = datetime.timedelta(minutes=15)
+    out = []
+    while t < stop:
+        out.append((t.astimezone(TZ), (t + step).astimezone(TZ)))
+        t += step
+
+    return out
+
+
+def synthetic(date, zone):
+    # type: (datetime.date, str) -> list
+    """
+    Generate a plausible day of prices in the format of the real API. The
+    same date and zone always give the same prices.
+
+    Args:
+        date (datetime.date): Local date.
+        zone (str): Bidding zone, SE1 to SE4.
+
+    Returns:
+        list: One dict per slot.
+    """
+    rng = random.Random(f"{date.isoformat()}{zone}")
+    level = ZONE_LEVEL[zone] * rng.uniform(0.3, 1.7)
+    exr = 11.2
+    prices = []
+    for start, end in slots(date):
+        hour = start.hour + start.minute / 60
+        # Morning and evening peaks, a cheap night and some noise
+        shape = 1 + 0.5 * math.sin((hour - 6) * math.pi / 12) ** 2
+        shape += 0.6 * math.exp(-((hour - 18) ** 2) / 4)
+        sek = round(level * shape * rng.uniform(0.8, 1.2) - rng.uniform(0, 0.15), 5)
+        prices.append(
+            {
+                "SEK_per_kWh": sek,
+                "EUR_per_kWh": round(sek / exr, 5),
+                "EXR": exr,
+                "time_start": start.isoformat(),
+                "time_end": end.isoformat(),
+            }
+        )
+
+    return prices
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Request handler, configured through the options of the server.
+    """
+
+    protocol_version = "HTTP/1.1"  # Keep-alive unless --close
+
+    def setup(self):
+        # type: () -> None
+        self.timeout = self.server.options.idle_timeout
+        super().setup()
+        self.server.stats["connections"] += 1
+
+    def do_GET(self):
+        # type: () -> None
+        self._respond(body=True)
+
+    def do_HEAD(self):
+        # type: () -> None
+        self._respond(body=False)
+
+    def _respond(self, body):
+        # type: (bool) -> None
+        """
+        Answer one request, applying the configured faults.
+        """
+        options = self.server.options
+        self.server.stats["requests"] += 1
+        if options.latency:
+            time.sleep(options.latency / 1000)
+
+        status, payload = self._payload()
+        if status == 200 and options.error and random.random() < options.error_rate:
+            status, payload = options.error, b"Injected error"
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if options.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(len(payload)))
+        if options.close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        if not body:
+            return
+
+        final = options.truncate is None or status != 200
+        if not final:
+            payload = payload[: options.truncate]
+            self.close_connection = True
+        self._write(payload, final)
+
+    def _payload(self):
+        # type: () -> tuple
+        """
+        Find the payload for the requested path.
+
+        Returns:
+            tuple: (status, body bytes)
+        """
+        match = PATH.match(self.path)
+        if match is None:
+            return 404, b"Not found"
+        year, month, day, zone = match.groups()
+        date = datetime.date(int(year), int(month), int(day))
+        if not self._published(date):
+            return 404, b"Not published"
+
+        options = self.server.options
+        path = os.path.join(options.data, year, f"{month}-{day}_{zone}.json")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return 200, f.read()
+        if options.record:
+            data = record(options.data, date, zone)
+            if data is not None:
+                return 200, data
+        if options.recorded_only:
+            return 404, b"Not recorded"
+
+        return 200, json.dumps(synthetic(date, zone)).encode()
+
+    def _published(self, date):
+        # type: (datetime.date) -> bool
+        """
+        Like the real API, tomorrow is published at the publish time and
+        later days are not published at all.
+        """
+        now = datetime.datetime.now(TZ)
+        tomorrow = now.date() + datetime.timedelta(1)
+        if date > tomorrow:
+            return False
+        if date == tomorrow:
+            publish = self.server.options.publish
+            if isinstance(publish, float):  # Seconds after the first request
+                first = self.server.asked.setdefault(date, time.monotonic())
+                return time.monotonic() - first >= publish
+            return now.time() >= publish
+
+        return True
+
+    def _write(self, payload, final=True):
+        # type: (bytes, bool) -> None
+        """
+        Send a body, throttled to the configured bandwidth.
+        """
+        options = self.server.options
+        piece = max(options.bandwidth // 10, 1) if options.bandwidth else len(payload)
+        try:
+            for i in range(0, len(payload), piece or 1):
+                data = payload[i : i + piece]
+                if options.chunked:
+                    data = b"%x\r\n%s\r\n" % (len(data), data)
+                self.wfile.write(data)
+                self.wfile.flush()
+                if options.bandwidth:
+                    time.sleep(len(data) / options.bandwidth)
+            if options.chunked and final:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        # type: (str, tuple) -> None
+        if not self.server.options.quiet:
+            super().log_message(format, *args)
+
+
+def record(data, date, zone):
+    # type: (str, datetime.date, str) -> bytes
+    """
+    Download a payload from the real API and save it under data.
+
+    Returns:
+        bytes: The payload, or None if the real API does not have it.
+    """
+    url = f"{UPSTREAM}/api/v1/prices/{date:%Y/%m-%d}_{zone}.json"
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            payload = response.read()
+    except OSError as e:
+        print(f"Failed to record {url}: {e}")
+        return None
+    path = os.path.join(data, f"{date:%Y}", f"{date:%m-%d}_{zone}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(payload)
+    print(f"Recorded {url}")
+
+    return payload
+
+
+def publish_time(text):
+    # type: (str) -> object
+    """
+    Parse --publish: a local time HH:MM, or +SECONDS after the first request
+    for tomorrow.
+
+    Returns:
+        object: datetime.time, or float seconds.
+    """
+    if text.startswith("+"):
+        return float(text[1:])
+
+    return datetime.time.fromisoformat(text)
+
+
+def parse_args(argv=None):
+    # type: (list) -> argparse.Namespace
+    """
+    Parse the command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--data", default="recorded", help="Directory of recorded payloads"
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="Record missing days from the real API"
+    )
+    parser.add_argument(
+        "--recorded-only",
+        action="store_true",
+        help="Answer 404 instead of generating prices for unrecorded days",
+    )
+    parser.add_argument(
+        "--latency", type=int, default=0, help="Delay before each response in ms"
+    )
+    parser.add_argument(
+        "--bandwidth", type=int, default=0, help="Body bytes per second, 0 for no limit"
+    )
+    parser.add_argument(
+        "--publish",
+        type=publish_time,
+        default=datetime.time(13),
+        help="Local time tomorrow's prices appear, HH:MM, or +SECONDS after "
+        "the first request for them",
+    )
+    parser.add_argument(
+        "--truncate",
+        type=int,
+        default=None,
+        help="Close the connection after this many body bytes",
+    )
+    parser.add_argument("--error", type=int, default=0, help="Status code to inject")
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=1.0,
+        help="Fraction of requests answered with --error",
+    )
+    parser.add_argument(
+        "--chunked", action="store_true", help="Use chunked transfer encoding"
+    )
+    parser.add_argument(
+        "--close", action="store_true", help="Close the connection after each response"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        help="Drop keep-alive connections idle for this many seconds",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Do not log requests")
+
+    return parser.parse_args(argv)
+
+
+def serve(options):
+    # type: (argparse.Namespace) -> ThreadingHTTPServer
+    """
+    Create a server for the options. Call serve_forever() on it to run it.
+    """
+    server = ThreadingHTTPServer((options.host, options.port), Handler)
+    server.options = options
+    server.stats = {"connections": 0, "requests": 0}
+    server.asked = {}  # Time of the first request per date, for --publish +N
+
+    return server
+
+
+def main():
+    # type: () -> None
+    options = parse_args()
+    server = serve(options)
+    host = socket.gethostbyname(socket.gethostname())
+    print(f"Serving prices on http://{host}:{options.port}, Ctrl-C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(
+        f"{server.stats['requests']} requests over {server.stats['connections']} connections"
+    )
+
+
+if __name__ == "__main__":
+    main()